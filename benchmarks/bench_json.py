@@ -0,0 +1,75 @@
+"""
+Micro benchmark of decoding get_accounts responses, comparing the standard library json module with the json backend
+picked by item_client.serializer as used by ItemClient, which keeps accounts as dicts by default, and when converting
+accounts to tuples or to the compact records the application uses.
+
+Usage:
+    python -m benchmarks.bench_json --accounts 100000 --repeat 5
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from operator import itemgetter
+
+from item_client import serializer
+from item_client.constants import *
+from item_client.fake_server import generate_accounts
+from item_client.records import AccountRecord
+
+
+def payload(n):
+    return json.dumps({"id": 1, "result": True, "message": f"{n} accounts found", "data": generate_accounts(n)}).encode()
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def memory(fn):
+    """
+    :return: tuple of bytes still held by the result and peak bytes allocated while decoding
+    """
+    tracemalloc.start()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark decoding of account payloads")
+    parser.add_argument("--accounts", "-n", type=int, default=100000, help="Number of accounts in the payload")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="Runs per case, the best run is reported")
+    args = parser.parse_args()
+
+    data = payload(args.accounts)
+    as_tuple = itemgetter(*ACCOUNT_FIELDS)
+    cases = [
+        ("stdlib json", lambda: json.loads(data)),
+        (f"{serializer.BACKEND} (default)", lambda: serializer.decode_response(data)),
+        (f"{serializer.BACKEND} + tuples", lambda: serializer.decode_response(data, as_tuple)),
+        (f"{serializer.BACKEND} + records (GUI)", lambda: serializer.decode_response(data, AccountRecord.from_dict)),
+    ]
+
+    print(f"{args.accounts} accounts, {len(data) / 1e6:.1f} MB payload")
+    print("{:<24}{:>12}{:>12}{:>14}{:>12}".format("case", "time (ms)", "speedup", "retained (MB)", "peak (MB)"))
+    baseline = None
+    for name, fn in cases:
+        seconds = best_of(fn, args.repeat)
+        baseline = baseline or seconds
+        retained, peak = memory(fn)
+        print("{:<24}{:>12.1f}{:>12.2f}{:>14.1f}{:>12.1f}".format(name, seconds * 1000, baseline / seconds,
+                                                                retained / 1e6, peak / 1e6))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Benchmark of commandline startup, the wall time of running the test command against a local fake server compared to
+starting an empty interpreter, and the slowest imports of item_client.client.
+
+The test command is used as a health check, so this should stay close to the interpreter baseline. With --max-ms the
+benchmark fails if the test command takes longer than that many milliseconds over the baseline.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 20 --max-ms 50
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from item_client.fake_server import FakeItemServer, generate_accounts
+
+
+def wall_times(cmd, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def slowest_imports(module, n):
+    """
+    :return: list of (cumulative microseconds, module name) of the n slowest imports, nested imports included
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], check=True,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark commandline startup time")
+    parser.add_argument("--runs", "-r", type=int, default=20, help="Runs per case, the median is reported")
+    parser.add_argument("--imports", "-n", type=int, default=10, help="Number of slowest imports to show")
+    parser.add_argument("--max-ms", type=float, help="Fail if the test command takes longer than this over baseline")
+    args = parser.parse_args()
+
+    with FakeItemServer(generate_accounts(10)) as server:
+        cases = [
+            ("interpreter", [sys.executable, "-c", "pass"]),
+            ("import item_client.client", [sys.executable, "-c", "import item_client.client"]),
+            ("client test", [sys.executable, "-m", "item_client.client", "--ip", server.host,
+                             "--port", str(server.port), "test"]),
+            ("client --help", [sys.executable, "-m", "item_client.client", "--help"]),
+        ]
+        print("{:<28}{:>12}{:>12}{:>14}".format("case", "median (ms)", "min (ms)", "overhead (ms)"))
+        baseline = None
+        overheads = {}
+        for name, cmd in cases:
+            times = wall_times(cmd, args.runs)
+            median = statistics.median(times) * 1000
+            baseline = median if baseline is None else baseline
+            overheads[name] = median - baseline
+            print("{:<28}{:>12.1f}{:>12.1f}{:>14.1f}".format(name, median, min(times) * 1000, overheads[name]))
+
+    print("\nSlowest imports of item_client.client")
+    for cumulative, name in slowest_imports("item_client.client", args.imports):
+        print("{:>10.1f} ms  {}".format(cumulative / 1000, name))
+
+    if args.max_ms is not None and overheads["client test"] > args.max_ms:
+        print(f"\nREGRESSION: client test takes {overheads['client test']:.1f} ms over the interpreter, "
+              f"more than {args.max_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
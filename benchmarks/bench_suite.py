@@ -0,0 +1,284 @@
+"""
+Benchmark suite of the client and GUI hot paths against a local fake server, for comparing performance run over run.
+
+Cases:
+    validate_account    validating a batch of accounts one by one, and with validate_accounts in one pass
+    Response            constructing responses and reading their properties
+    decode              decoding a get_accounts payload into records
+    get_accounts        fetching and decoding all accounts from the fake server
+    add_accounts        populating MainView, with the memory held by the added accounts
+    update_accounts     refreshing a populated MainView after 1% of accounts changed, and when nothing changed
+
+The GUI cases are skipped if PySide6 is not installed. Timings are the best of --repeat runs, which is the least
+affected by other load on the machine. Results are saved as json with --output, and compared with an earlier run with
+--baseline, cases more than --threshold slower (or holding that much more memory) are flagged as regressions and the
+benchmark fails.
+
+Usage:
+    python -m benchmarks.bench_suite --output results.json
+    python -m benchmarks.bench_suite --sizes 1000,100000 --baseline results.json --threshold 0.2
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from item_client import serializer
+from item_client.client import ItemClient, Response
+from item_client.fake_server import FakeItemServer, generate_accounts
+from item_client.records import AccountRecord
+from item_client.validation import validate_account, validate_accounts
+
+RESULTS_VERSION = 1
+CHANGED_FRACTION = 0.01
+
+
+def parse_sizes(value):
+    return [int(size) for size in value.split(",") if size]
+
+
+def timings(fn, repeat, setup=None):
+    """
+    :param setup: Called before each run and not timed, its result is passed to fn
+    :return: list of seconds per run
+    """
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        gc.collect()
+        start = time.perf_counter()
+        fn(arg) if setup is not None else fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def retained_memory(fn):
+    """
+    :return: bytes still allocated after fn returns, while its result is kept alive
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained
+
+
+def git_commit():
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True)
+        return proc.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result(times, **extra):
+    result = {"best": min(times), "median": sorted(times)[len(times) // 2], "runs": len(times)}
+    result.update(extra)
+    return result
+
+
+def bench_validate(accounts, repeat):
+    return result(timings(lambda: all(map(validate_account, accounts)), repeat), items=len(accounts))
+
+
+def bench_validate_batch(accounts, repeat):
+    return result(timings(lambda: validate_accounts(accounts), repeat), items=len(accounts))
+
+
+def bench_response(envelopes, repeat):
+    def run():
+        for envelope in envelopes:
+            resp = Response(envelope)
+            resp.packet_id, resp.result, resp.message, resp.data
+    return result(timings(run, repeat), items=len(envelopes))
+
+
+def bench_decode(payload, repeat):
+    decode = lambda: serializer.decode_response(payload, AccountRecord.from_dict)
+    return result(timings(decode, repeat), retained_mb=retained_memory(decode) / 1e6, payload_mb=len(payload) / 1e6)
+
+
+def bench_get_accounts(server, repeat):
+    with ItemClient(server.host, server.port, retry=None, breaker=False) as client:
+        def run():
+            if not client.get_accounts().result:
+                raise RuntimeError("get_accounts failed")
+        return result(timings(run, repeat))
+
+
+class GuiBench:
+    """
+    MainView cases, the view is created without snapshot or polling so only the measured work runs
+    """
+    def __init__(self):
+        from PySide6.QtWidgets import QApplication
+        from item_client import main
+
+        self.main = main
+        self.app = QApplication.instance() or QApplication([])
+
+    def wait(self, done, timeout=600):
+        end = time.monotonic() + timeout
+        while not done():
+            if time.monotonic() > end:
+                raise TimeoutError("Timed out waiting for the view")
+            self.app.processEvents()
+            # Spinning processEvents without yielding starves the worker threads
+            time.sleep(0.001)
+
+    def view(self, server):
+        view = self.main.MainView(server.host, server.port, snapshot_path="", poll=False)
+        self.wait(lambda: not view.executor.busy)
+        return view
+
+    def refresh(self, view):
+        view.update_accounts()
+        self.wait(lambda: not view.executor.is_busy(view.REQUEST_REFRESH))
+
+    def bench_add_accounts(self, accounts, repeat):
+        with FakeItemServer() as server:
+            views = []
+
+            def setup():
+                views.append(self.view(server))
+                return views[-1]
+
+            times = timings(lambda view: view.add_accounts(accounts), repeat, setup)
+            view = setup()
+            retained = retained_memory(lambda: view.add_accounts(accounts))
+            for view in views:
+                view.shutdown()
+        return result(times, retained_mb=retained / 1e6)
+
+    def bench_update_accounts(self, accounts, repeat):
+        """
+        :return: tuple of results when 1% of accounts changed and when nothing changed
+        """
+        with FakeItemServer(accounts) as server:
+            view = self.view(server)
+            if len(view.model) != len(accounts):
+                raise RuntimeError(f"View shows {len(view.model)} of {len(accounts)} accounts")
+            step = max(1, int(1 / CHANGED_FRACTION))
+            edits = iter(range(sys.maxsize))
+
+            def change_accounts():
+                edit = next(edits)
+                for account in accounts[::step]:
+                    server.store.edit_account(account["orgno"], {"leader_name": f"leader{edit}"})
+                view.client.cache.clear()
+                return view
+
+            changed = timings(self.refresh, repeat, change_accounts)
+
+            def expire_cache():
+                # Make the cached response stale so the refresh revalidates it with the server
+                view.client.cache.ttl = 0
+                return view
+
+            unchanged = timings(self.refresh, repeat, expire_cache)
+            view.shutdown()
+        return result(changed, changed=len(accounts[::step])), result(unchanged)
+
+
+def compare(results, baseline, threshold):
+    """
+    :return: list of messages for cases slower or using more memory than baseline by more than threshold
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ("best", "retained_mb"):
+            if metric in current and previous.get(metric) and current[metric] > previous[metric] * (1 + threshold):
+                change = current[metric] / previous[metric] - 1
+                regressions.append(f"{name} {metric}: {previous[metric]:.4g} -> {current[metric]:.4g} "
+                                   f"(+{change:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the client and GUI hot paths")
+    parser.add_argument("--sizes", type=parse_sizes, default=[1000, 100000, 1000000],
+                        help="Comma separated numbers of accounts for decode and get_accounts")
+    parser.add_argument("--gui-sizes", type=parse_sizes, default=[1000, 100000],
+                        help="Comma separated numbers of accounts for the MainView cases")
+    parser.add_argument("--batch", type=int, default=100000, help="Accounts validated and responses constructed")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="Runs per case, the best run is compared")
+    parser.add_argument("--no-gui", action="store_true", help="Skip the MainView cases")
+    parser.add_argument("--output", "-o", help="Save results to this json file")
+    parser.add_argument("--baseline", "-b", help="Compare with results saved by an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Fraction slower that counts as a regression")
+    args = parser.parse_args()
+
+    results = {}
+
+    def record(name, res):
+        results[name] = res
+        extra = "".join(f"  {key}={value:.1f}" for key, value in res.items() if key.endswith("_mb"))
+        print("{:<36}{:>12.2f}{:>12.2f}{}".format(name, res["best"] * 1000, res["median"] * 1000, extra), flush=True)
+
+    print("{:<36}{:>12}{:>12}".format("case", "best (ms)", "median (ms)"))
+    batch = generate_accounts(args.batch)
+    record(f"validate_account[{args.batch}]", bench_validate(batch, args.repeat))
+    record(f"validate_accounts[{args.batch}]", bench_validate_batch(batch, args.repeat))
+    envelopes = [{"id": i, "result": True, "message": "", "data": account} for i, account in enumerate(batch)]
+    record(f"Response[{args.batch}]", bench_response(envelopes, args.repeat))
+    del batch, envelopes
+
+    for size in args.sizes:
+        accounts = generate_accounts(size)
+        payload = serializer.dumps({"id": 1, "result": True, "message": "", "data": accounts})
+        record(f"decode[{size}]", bench_decode(payload, args.repeat))
+        del payload
+        with FakeItemServer(accounts) as server:
+            record(f"get_accounts[{size}]", bench_get_accounts(server, args.repeat))
+
+    if not args.no_gui:
+        try:
+            gui = GuiBench()
+        except ImportError as e:
+            gui = None
+            print(f"Skipping MainView cases: {e}")
+        for size in args.gui_sizes if gui is not None else ():
+            accounts = generate_accounts(size)
+            record(f"add_accounts[{size}]", gui.bench_add_accounts(accounts, args.repeat))
+            changed, unchanged = gui.bench_update_accounts(accounts, args.repeat)
+            record(f"update_accounts[{size}] changed", changed)
+            record(f"update_accounts[{size}] unchanged", unchanged)
+
+    run = {
+        "version": RESULTS_VERSION,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "serializer": serializer.BACKEND,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {baseline.get('commit') or args.baseline} from {baseline.get('time')}")
+        regressions = compare(results, baseline.get("results", {}), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
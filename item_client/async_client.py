@@ -0,0 +1,93 @@
+import asyncio
+import logging
+
+import aiohttp
+
+from item_client import serializer
+from item_client.client import (BaseItemClient, Response, URL_ACCOUNT, URL_ACCOUNTS, URL_ADD, URL_DELETE, URL_EDIT,
+                                URL_TEST)
+from item_client.exceptions import ServerError
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 100
+
+
+class AsyncItemClient(BaseItemClient):
+    """
+    asyncio version of ItemClient, methods are coroutines returning the same Response objects.
+
+    Requests share one connection pool and at most max_concurrency requests are in flight at any time, so callers
+    can safely schedule thousands of calls at once, e.g.
+        async with AsyncItemClient("127.0.0.1", 8080) as client:
+            responses = await asyncio.gather(*(client.get_account(i) for i in account_ids))
+    Only a single server is supported, use ItemClient for several replicas.
+    """
+    def __init__(self, ip, port, max_concurrency=DEFAULT_MAX_CONCURRENCY, account_factory=None, **kwargs):
+        super().__init__(ip, port, **kwargs)
+        if len(self.addresses) > 1:
+            raise ValueError("AsyncItemClient supports a single server, use ItemClient for several replicas")
+        self.max_concurrency = max_concurrency
+        self.account_factory = account_factory
+        self._semaphore = None
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def session(self):
+        """
+        Lazily created session, must be first used from within a running event loop
+        """
+        if self._session is None:
+            connect_timeout, read_timeout = self.timeout
+            connector = aiohttp.TCPConnector(limit=self.pool_size, force_close=not self.keep_alive)
+            timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self):
+        """
+        Close the session and all pooled connections
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._semaphore = None
+
+    async def _request(self, method, url, **kwargs):
+        session = self.session
+        async with self._semaphore:
+            async with session.request(method, url, **kwargs) as resp:
+                body = await resp.read()
+        if resp.status >= 500:
+            raise ServerError(resp.status, body.decode(errors="replace"))
+        try:
+            # Server does not always set a json content type, so decode the body directly
+            return Response(serializer.decode_response(body, self.account_factory))
+        except ValueError:
+            raise ServerError(resp.status, body.decode(errors="replace"))
+
+    async def test(self):
+        return await self._request("GET", URL_TEST.format(self.url_prefix))
+
+    async def get_account(self, account_id):
+        return await self._request("GET", URL_ACCOUNT.format(self.url_prefix, account_id))
+
+    async def get_accounts(self, n=0):
+        return await self._request("GET", URL_ACCOUNTS.format(self.url_prefix, n))
+
+    async def add_account(self, account_info):
+        return await self._request("POST", URL_ADD.format(self.url_prefix), data=serializer.dumps(account_info))
+
+    async def edit_account(self, account_info):
+        account_id = account_info.get("orgno")
+        return await self._request("PUT", URL_EDIT.format(self.url_prefix, account_id), data=serializer.dumps(account_info))
+
+    async def delete_account(self, account_id):
+        return await self._request("DELETE", URL_DELETE.format(self.url_prefix, account_id))
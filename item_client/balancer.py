@@ -0,0 +1,166 @@
+import logging
+import threading
+
+from item_client.resilience import CircuitBreaker
+
+LOGGER = logging.getLogger(__name__)
+
+ROUND_ROBIN = "round_robin"
+LEAST_OUTSTANDING = "least_outstanding"
+STRATEGIES = [ROUND_ROBIN, LEAST_OUTSTANDING]
+
+DEFAULT_HEALTH_CHECK_INTERVAL = 5
+DEFAULT_HEALTH_CHECK_TIMEOUT = 2
+
+
+class Replica:
+    """
+    One server behind a LoadBalancer, with its own circuit breaker and request counters
+    """
+    def __init__(self, host, port, breaker=True):
+        self.host = host
+        self.port = port
+        self.url_prefix = f"http://{host}:{port}"
+        self.breaker = CircuitBreaker(self.url_prefix) if breaker else None
+        self.healthy = True
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+
+    def __repr__(self):
+        return f"Replica({self.url_prefix})"
+
+    @property
+    def stats(self):
+        stats = {"healthy": self.healthy, "outstanding": self.outstanding, "requests": self.requests,
+                 "failures": self.failures}
+        if self.breaker is not None:
+            stats["breaker"] = self.breaker.stats
+        return stats
+
+
+class LoadBalancer:
+    """
+    Spreads requests over replicas of the same server.
+
+    Replicas are picked in turn (round_robin) or by the fewest requests in flight (least_outstanding, ties are taken
+    in turn). Replicas whose circuit breaker is open are skipped, and replicas that failed their last health check are
+    only used when no healthy replica is left. Callers retrying a failed request pass the replicas already tried so
+    the request fails over to another one.
+    """
+    def __init__(self, addresses, strategy=ROUND_ROBIN, breaker=True,
+                 health_check_interval=DEFAULT_HEALTH_CHECK_INTERVAL):
+        """
+        :param addresses: List of (host, port) of every replica
+        :param float health_check_interval: Seconds between health checks, None to only rely on circuit breakers
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown balancing strategy: {strategy}")
+        if not addresses:
+            raise ValueError("No servers given")
+        self.replicas = [Replica(host, port, breaker) for host, port in addresses]
+        self.strategy = strategy
+        self.health_check_interval = health_check_interval
+        self._next = 0
+        self._lock = threading.Lock()
+        # Each run of health checks has its own stop event, so a check still running after stop_health_checks can't
+        # keep or restart a stopped run
+        self._stop = None
+        self._thread = None
+
+    def __len__(self):
+        return len(self.replicas)
+
+    def _candidates(self, tried):
+        count = len(self.replicas)
+        with self._lock:
+            start = self._next
+            self._next = (start + 1) % count
+            replicas = [self.replicas[(start + i) % count] for i in range(count)]
+            if self.strategy == LEAST_OUTSTANDING:
+                # Sorting is stable, so replicas with as many requests in flight are still taken in turn
+                replicas.sort(key=lambda replica: replica.outstanding)
+        return sorted(replicas, key=lambda replica: (replica in tried, not replica.healthy))
+
+    def acquire(self, tried=()):
+        """
+        Pick the replica to send a request to, it must be given back with release once the request is done
+        :param tried: Replicas that already failed this request, only used again if no other replica is available
+        :raises CircuitOpenError: if the circuit breakers of all replicas are open
+        """
+        for replica in self._candidates(tried):
+            if replica.breaker is None or replica.breaker.ready():
+                with self._lock:
+                    replica.outstanding += 1
+                    replica.requests += 1
+                return replica
+
+        # Imported here as it depends on requests, which the commandline only loads when needed
+        from item_client.exceptions import CircuitOpenError
+
+        servers = ", ".join(replica.url_prefix for replica in self.replicas)
+        raise CircuitOpenError(servers, min(replica.breaker.retry_after for replica in self.replicas))
+
+    def release(self, replica, success):
+        with self._lock:
+            replica.outstanding -= 1
+            if not success:
+                replica.failures += 1
+        if replica.breaker is not None:
+            if success:
+                replica.breaker.record_success()
+            else:
+                replica.breaker.record_failure()
+
+    def check(self, check, stop=None):
+        """
+        Health check every replica once
+        :param check: Called with a replica, returns True if it is healthy
+        :param threading.Event stop: Stop checking once set, results of checks running when it's set are dropped
+        """
+        for replica in self.replicas:
+            if stop is not None and stop.is_set():
+                return
+            healthy = check(replica)
+            if stop is not None and stop.is_set():
+                return
+            if healthy != replica.healthy:
+                if healthy:
+                    LOGGER.info(f"Server {replica.url_prefix} passed its health check")
+                else:
+                    LOGGER.warning(f"Server {replica.url_prefix} failed its health check, avoiding it")
+            replica.healthy = healthy
+            if healthy and replica.breaker is not None and replica.breaker.failures:
+                # Take a recovered replica back without waiting for the breaker to try it
+                replica.breaker.record_success()
+
+    def start_health_checks(self, check):
+        """
+        Run check every health_check_interval seconds on a background thread, only if there is more than one replica
+        """
+        if len(self.replicas) < 2 or not self.health_check_interval or self._thread is not None:
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run_health_checks, args=(check, self._stop), daemon=True)
+        self._thread.start()
+
+    def _run_health_checks(self, check, stop):
+        while not stop.wait(self.health_check_interval):
+            try:
+                self.check(check, stop)
+            except Exception as e:
+                LOGGER.error(f"Health check failed: {e}")
+
+    def stop_health_checks(self):
+        """
+        Stop health checks, waiting a short while for a running check. A check that takes longer finishes in the
+        background and its result is dropped
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(DEFAULT_HEALTH_CHECK_TIMEOUT)
+            self._thread = None
+
+    @property
+    def stats(self):
+        return {replica.url_prefix: replica.stats for replica in self.replicas}
@@ -0,0 +1,221 @@
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+
+from item_client.constants import *
+
+LOGGER = logging.getLogger(__name__)
+
+ENDPOINTS = ["test", "account", "accounts", "add", "edit", "delete"]
+DEFAULT_MIX = "test=1,account=8,accounts=1"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_DURATION = 10
+DEFAULT_ORGNOS = "1-1000"
+PERCENTILES = [50, 90, 99]
+
+
+def parse_mix(mix: str):
+    """
+    Parse a mix of endpoint weights, e.g. "account=8,accounts=1,test=1"
+    :return: dict of endpoint to weight
+    """
+    weights = {}
+    for item in mix.split(","):
+        endpoint, _, weight = item.partition("=")
+        endpoint = endpoint.strip()
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {endpoint}, must be one of {ENDPOINTS}")
+        weights[endpoint] = float(weight) if weight else 1.0
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError("Mix needs at least one endpoint with a positive weight")
+    return weights
+
+
+def parse_range(value: str):
+    low, _, high = value.partition("-")
+    low = int(low)
+    high = int(high) if high else low
+    if high < low:
+        raise ValueError(f"Invalid range {value}")
+    return low, high
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.rejected = 0
+
+    def summary(self, duration):
+        latencies = sorted(self.latencies)
+        summary = {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "throughput": len(latencies) / duration if duration else 0.0,
+        }
+        for pct in PERCENTILES:
+            summary[f"p{pct}_ms"] = percentile(latencies, pct) * 1000
+        summary["max_ms"] = (latencies[-1] if latencies else 0.0) * 1000
+        return summary
+
+
+class Benchmark:
+    """
+    Drives a weighted mix of endpoints from a number of worker threads for a fixed duration.
+
+    If rate is given, requests are spread evenly at rate requests per second across all workers, otherwise every
+    worker sends its next request as soon as the previous one completes. The client should not retry or use a circuit
+    breaker, calls the breaker rejected without sending a request are counted separately and not timed.
+    """
+    def __init__(self, client, mix=DEFAULT_MIX, concurrency=DEFAULT_CONCURRENCY, duration=DEFAULT_DURATION,
+                 rate=None, orgnos=DEFAULT_ORGNOS, seed=None):
+        self.client = client
+        self.weights = parse_mix(mix)
+        self.concurrency = concurrency
+        self.duration = duration
+        self.rate = rate
+        self.orgnos = parse_range(orgnos)
+        self.stats = {endpoint: EndpointStats() for endpoint in self.weights}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._slots = itertools.count()
+        # New accounts are numbered after the range used for lookups, run moves them past the accounts on the server
+        self._add_orgnos = itertools.count(self.orgnos[1] + 1)
+        self.elapsed = 0.0
+
+    def _next(self):
+        with self._lock:
+            endpoint = self._random.choices(list(self.weights), weights=list(self.weights.values()))[0]
+            orgno = self._random.randint(*self.orgnos)
+            if endpoint == "add":
+                orgno = next(self._add_orgnos)
+            return endpoint, orgno
+
+    def _account(self, orgno):
+        return {
+            FIELD_NAME: f"bench-{orgno}",
+            FIELD_ORGNO: orgno,
+            FIELD_LEADER_TITLE: "bench",
+            FIELD_LEADER_NAME: "bench",
+            FIELD_TYPE: "bench",
+        }
+
+    def _call(self, endpoint, orgno):
+        if endpoint == "test":
+            return self.client.test()
+        if endpoint == "account":
+            return self.client.get_account(orgno)
+        if endpoint == "accounts":
+            return self.client.get_accounts()
+        if endpoint == "add":
+            return self.client.add_account(self._account(orgno))
+        if endpoint == "edit":
+            return self.client.edit_account(self._account(orgno))
+        return self.client.delete_account(orgno)
+
+    def _worker(self, start, deadline):
+        from item_client.exceptions import CircuitOpenError
+
+        while True:
+            if self.rate:
+                slot = start + next(self._slots) / self.rate
+                if slot >= deadline:
+                    return
+                delay = slot - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            elif time.perf_counter() >= deadline:
+                return
+
+            endpoint, orgno = self._next()
+            stats = self.stats[endpoint]
+            before = time.perf_counter()
+            try:
+                ok = self._call(endpoint, orgno).result
+            except CircuitOpenError:
+                with self._lock:
+                    stats.rejected += 1
+                continue
+            except Exception as e:
+                LOGGER.debug("%s failed: %s", endpoint, e)
+                ok = False
+            latency = time.perf_counter() - before
+            # list.append is atomic, no locking needed
+            stats.latencies.append(latency)
+            if not ok:
+                # += is not, counts would get lost between workers
+                with self._lock:
+                    stats.errors += 1
+
+    def _first_free_orgno(self):
+        """
+        :return: Orgno after the highest one on the server and the orgnos range, so added accounts don't clash
+        """
+        first = self.orgnos[1] + 1
+        try:
+            res = self.client.get_accounts()
+        except Exception as e:
+            LOGGER.warning(f"Could not get accounts, adding accounts from orgno {first}: {e}")
+            return first
+        if not res.result:
+            LOGGER.warning(f"Could not get accounts, adding accounts from orgno {first}: {res.message}")
+            return first
+        return max([first] + [account[FIELD_ORGNO] + 1 for account in res.data])
+
+    def run(self):
+        if "add" in self.weights:
+            self._add_orgnos = itertools.count(self._first_free_orgno())
+        LOGGER.info(f"Benchmarking {self.weights} with {self.concurrency} workers for {self.duration}s")
+        start = time.perf_counter()
+        deadline = start + self.duration
+        workers = [threading.Thread(target=self._worker, args=(start, deadline), daemon=True)
+                   for _ in range(self.concurrency)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.elapsed = time.perf_counter() - start
+        return self.report()
+
+    def report(self):
+        """
+        :return: dict of endpoint to summary, plus a "total" entry over all endpoints
+        """
+        report = {endpoint: stats.summary(self.elapsed) for endpoint, stats in self.stats.items()}
+        total = EndpointStats()
+        for stats in self.stats.values():
+            total.latencies.extend(stats.latencies)
+            total.errors += stats.errors
+            total.rejected += stats.rejected
+        report["total"] = total.summary(self.elapsed)
+        return report
+
+
+def format_table(report):
+    columns = ["requests", "errors", "rejected", "throughput"] + [f"p{pct}_ms" for pct in PERCENTILES] + ["max_ms"]
+    lines = ["{:<10}".format("endpoint") + "".join("{:>12}".format(column) for column in columns)]
+    for endpoint, summary in report.items():
+        cells = []
+        for column in columns:
+            value = summary[column]
+            cells.append("{:>12}".format(value if isinstance(value, int) else "{:.2f}".format(value)))
+        lines.append("{:<10}".format(endpoint) + "".join(cells))
+    return "\n".join(lines)
+
+
+def format_json(report):
+    return json.dumps(report, indent=2)
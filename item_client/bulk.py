@@ -0,0 +1,118 @@
+import logging
+from collections import deque
+
+from item_client.constants import *
+from item_client.records import RECORD_SCHEMA, AccountRecord
+from item_client.validation import ValidationReport
+
+LOGGER = logging.getLogger(__name__)
+
+BULK_ADD = "bulk-add"
+BULK_EDIT = "bulk-edit"
+BULK_DELETE = "bulk-delete"
+BULK_COMMANDS = [BULK_ADD, BULK_EDIT, BULK_DELETE]
+
+DEFAULT_CONCURRENCY = 8
+
+
+def iter_records(stream):
+    """
+    Parse newline delimited json lazily, one line at a time
+    :return: generator of (line number, record, error), record is None if the line is invalid
+    """
+    from item_client import serializer
+
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, serializer.loads(line), None
+        except ValueError as e:
+            yield line_no, None, f"Invalid json: {e}"
+
+
+def validate_record(command, record):
+    """
+    Check a record can be sent for the given bulk command, accounts are converted to AccountRecords
+    :return: tuple of (record to send, error message or None if record is valid)
+    """
+    if command == BULK_DELETE:
+        # Deletes only need an orgno, either bare or as part of an account
+        orgno = record.get(FIELD_ORGNO) if isinstance(record, dict) else record
+        if not isinstance(orgno, int):
+            return record, f"Field {FIELD_ORGNO} is not an int"
+        return orgno, None
+    account = RECORD_SCHEMA.convert(record) if isinstance(record, dict) else None
+    if account is None:
+        return record, RECORD_SCHEMA.error(record)
+    return account, None
+
+
+def _send(client, command, record):
+    if command == BULK_ADD:
+        return client.add_account(record)
+    if command == BULK_EDIT:
+        return client.edit_account(record)
+    return client.delete_account(record)
+
+
+def _result(line_no, record, resp=None, error=None):
+    orgno = record.get(FIELD_ORGNO) if isinstance(record, (dict, AccountRecord)) else record
+    if error is not None:
+        return {"line": line_no, FIELD_ORGNO: orgno, "result": False, "message": error}
+    return {"line": line_no, FIELD_ORGNO: orgno, "result": resp.result, "message": resp.message}
+
+
+def run_bulk(client, command, input_stream, output_stream, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Send every record of input_stream with a pool of workers and write one result line per record to output_stream.
+
+    At most 2 * concurrency records are held in memory at any time and results are written in input order.
+    :return: tuple of (number of succeeded records, number of failed records)
+    """
+    # Imported when used so the commandline starts quickly for other commands
+    from concurrent.futures import ThreadPoolExecutor
+    from item_client import serializer
+
+    succeeded = failed = 0
+    pending = deque()
+    # Invalid lines are reported together at the end instead of one log message each
+    report = ValidationReport()
+
+    def flush(limit):
+        nonlocal succeeded, failed
+        while len(pending) > limit:
+            line_no, record, future, error = pending.popleft()
+            if error is not None:
+                result = _result(line_no, record, error=error)
+            else:
+                try:
+                    result = _result(line_no, record, resp=future.result())
+                except Exception as e:
+                    result = _result(line_no, record, error=f"Request failed: {e}")
+            if result["result"]:
+                succeeded += 1
+            else:
+                failed += 1
+            output_stream.write(serializer.dumps(result).decode() + "\n")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for line_no, record, error in iter_records(input_stream):
+            report.total += 1
+            if error is None:
+                record, error = validate_record(command, record)
+            if error is not None:
+                # Queued with the sent records so results stay in order without waiting for them
+                # Grouped without details, e.g. where a line isn't valid json
+                report.add(line_no, error.split(":", 1)[0])
+                pending.append((line_no, record, None, error))
+            else:
+                pending.append((line_no, record, executor.submit(_send, client, command, record), None))
+            flush(concurrency * 2)
+        flush(0)
+
+    if report.invalid:
+        LOGGER.warning(f"{command}: invalid lines, {report}")
+    LOGGER.info(f"{command}: {succeeded} succeeded, {failed} failed")
+    return succeeded, failed
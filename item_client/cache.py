@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+
+from collections import OrderedDict
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_TTL = 30
+
+
+class CacheEntry:
+    __slots__ = ("value", "etag", "expires")
+
+    def __init__(self, value, etag, expires):
+        self.value = value
+        self.etag = etag
+        self.expires = expires
+
+    @property
+    def fresh(self):
+        return time.monotonic() < self.expires
+
+
+class ResponseCache:
+    """
+    Thread safe LRU cache of responses with a time to live per entry.
+
+    Expired entries are kept until evicted so they can be revalidated with their ETag, if the server sent one.
+    Cached values are shared between callers and must not be modified.
+    """
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL):
+        if max_size < 1:
+            raise ValueError("Invalid cache size")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        :return: Fresh or expired entry for key or None if not cached, only fresh entries count as a hit
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if entry.fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def put(self, key, value, etag=None):
+        with self._lock:
+            self._entries[key] = CacheEntry(value, etag, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def revalidated(self, key):
+        """
+        Mark an expired entry as fresh again after the server confirmed it has not changed
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires = time.monotonic() + self.ttl
+                self.revalidations += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_prefix(self, prefix):
+        """
+        Invalidate all entries with a tuple key starting with prefix
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == prefix]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -1,12 +1,23 @@
 import argparse
 import ipaddress
+import itertools
 import json
 import logging
 import os
-import requests
 import sys
+import threading
+import time
 
+from item_client import bench
+from item_client.balancer import (DEFAULT_HEALTH_CHECK_INTERVAL, DEFAULT_HEALTH_CHECK_TIMEOUT, ROUND_ROBIN, STRATEGIES,
+                                  LoadBalancer)
+from item_client.bulk import BULK_ADD, BULK_COMMANDS, BULK_DELETE, BULK_EDIT, DEFAULT_CONCURRENCY, run_bulk
 from item_client.config import setup_logging
+from item_client.records import to_records
+from item_client.resilience import RetryPolicy
+
+# The commandline is used as a frequent health check, so this module only imports what is needed to start.
+# requests, urllib3, the json backend and modules depending on them are imported where they're used
 
 LOGGER = logging.getLogger(__name__)
 """
@@ -19,11 +30,44 @@ LOGGER = logging.getLogger(__name__)
         self.app.router.add_delete("/api/v1/accounts/delete/{account_id}", self.delete_contact)
 """
 
-URL_ACCOUNT = "{}/api/v1/account/{}"
-URL_ACCOUNTS = "{}/api/v1/accounts/{}"
-URL_ADD = "{}/api/v1/accounts/add"
-URL_EDIT = "{}/api/v1/accounts/edit/{}"
-URL_DELETE = "{}/api/v1/accounts/delete/{}"
+PATH_TEST = "/api/v1/test"
+PATH_ACCOUNT = "/api/v1/account/{}"
+PATH_ACCOUNTS = "/api/v1/accounts/{}"
+PATH_ACCOUNTS_PAGE = "/api/v1/accounts/{}?offset={}"
+PATH_ADD = "/api/v1/accounts/add"
+PATH_EDIT = "/api/v1/accounts/edit/{}"
+PATH_DELETE = "/api/v1/accounts/delete/{}"
+
+URL_TEST = "{}" + PATH_TEST
+URL_ACCOUNT = "{}" + PATH_ACCOUNT
+URL_ACCOUNTS = "{}" + PATH_ACCOUNTS
+URL_ACCOUNTS_PAGE = "{}" + PATH_ACCOUNTS_PAGE
+URL_ADD = "{}" + PATH_ADD
+URL_EDIT = "{}" + PATH_EDIT
+URL_DELETE = "{}" + PATH_DELETE
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_PAGE_SIZE = 1000
+
+IDEMPOTENT_METHODS = {"GET", "PUT", "DELETE"}
+DEFAULT_RETRY = RetryPolicy()
+
+CACHE_ACCOUNT = "account"
+CACHE_ACCOUNTS = "accounts"
+
+def _not_connected(error):
+    """
+    True if the request failed before it could reach the server, so it's safe to send it again
+    """
+    from requests.exceptions import ConnectionError, ConnectTimeout
+    from urllib3.exceptions import NewConnectionError
+
+    if isinstance(error, ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if isinstance(error, ConnectionError) and error.args else None
+    return isinstance(reason, NewConnectionError)
 
 class Response(dict):
     @property
@@ -42,10 +86,44 @@ class Response(dict):
     def data(self):
         return self.get("data", {})
 
-class ItemClient():
-    def __init__(self, ip, port):
-        self.host = self._validate_ip(ip)
-        self.port = self._validate_port(port)
+    @property
+    def conflict(self):
+        """
+        True if an edit was rejected as the account changed since it was loaded, data is then the current account
+        """
+        return self.get("conflict", False)
+
+def parse_addresses(ip, port):
+    """
+    Pair up ips and ports of one or more servers, a single ip or port is used for all servers
+    :param ip: ip address or list of them
+    :param port: port or list of them
+    :return: list of (ip, port)
+    """
+    ips = list(ip) if isinstance(ip, (list, tuple)) else [ip]
+    ports = list(port) if isinstance(port, (list, tuple)) else [port]
+    if len(ips) == 1:
+        ips *= len(ports)
+    if len(ports) == 1:
+        ports *= len(ips)
+    if not ips or len(ips) != len(ports):
+        raise ValueError("Number of ips and ports do not match")
+    return list(zip(ips, ports))
+
+class BaseItemClient():
+    """
+    Connection settings shared by the blocking and asyncio clients.
+
+    ip and port may be lists to use several replicas of the server, see parse_addresses, which only ItemClient
+    supports. host, port and url_prefix are those of the first one
+    """
+    def __init__(self, ip, port, pool_size=DEFAULT_POOL_SIZE, keep_alive=True,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT):
+        self.addresses = [(self._validate_ip(ip), self._validate_port(port)) for ip, port in parse_addresses(ip, port)]
+        self.host, self.port = self.addresses[0]
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.timeout = (connect_timeout, read_timeout)
 
     def _validate_ip(self, ip):
         try:
@@ -63,31 +141,548 @@ class ItemClient():
     def url_prefix(self):
         return "http://{}:{}".format(self.host, self.port)
 
+class ItemClient(BaseItemClient):
+    """
+    Client for the Item-RestAPI server.
+
+    All requests go through a single pooled session so connections are kept alive and reused between calls.
+    The client should be closed when no longer needed, either with close() or by using it as a context manager.
+    If a ResponseCache is given, get_account and get_accounts responses are cached and entries are invalidated by
+    add_account, edit_account and delete_account.
+
+    With several replicas requests are spread over them by a LoadBalancer. Failed requests are retried on another
+    replica right away, without waiting or counting as a retry, and replicas are health checked in the background.
+    """
+    def __init__(self, ip, port, cache=None, retry=DEFAULT_RETRY, breaker=True, deadline=None, hooks=(),
+                 account_factory=None, balancing=ROUND_ROBIN,
+                 health_check_interval=DEFAULT_HEALTH_CHECK_INTERVAL, **kwargs):
+        """
+        :param RetryPolicy retry: How to retry failed requests, None to never retry. Requests that may change data
+        twice (add_account) are only retried if the connection could not be made
+        :param bool breaker: Pause requests to a replica while it keeps failing, per replica. Requests with retries left
+        wait for the pause to end, others fail fast with CircuitOpenError
+        :param float deadline: Maximum seconds for a request including all retries
+        :param hooks: Callables called with a RequestInfo after every request, e.g. a MetricsHook
+        :param account_factory: Converts every account in a response as it's decoded, see serializer.decode_response.
+        Accounts are plain dicts by default, AccountRecord.from_dict makes them validated compact records
+        :param str balancing: How to pick the replica for a request, round_robin or least_outstanding
+        :param float health_check_interval: Seconds between health checks of replicas, None to disable them
+        """
+        super().__init__(ip, port, **kwargs)
+        self.cache = cache
+        self.retry = retry
+        self.balancer = LoadBalancer(self.addresses, balancing, breaker, health_check_interval)
+        self.deadline = deadline
+        self.retries = 0
+        self.failovers = 0
+        # Whether the server sends ETags to revalidate cached responses with, None until a response was cached
+        self.etags_supported = None
+        self.hooks = list(hooks)
+        self.account_factory = account_factory
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def session(self):
+        """
+        Lazily created session, shared by all requests made by this client
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+                    self.balancer.start_health_checks(self._check)
+        return self._session
+
+    def _create_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from item_client.metrics import TimedHTTPConnectionPool
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.addresses), pool_maxsize=self.pool_size)
+        # Time new connections for the request hooks
+        adapter.poolmanager.pool_classes_by_scheme = dict(adapter.poolmanager.pool_classes_by_scheme,
+                                                          http=TimedHTTPConnectionPool)
+        session.mount("http://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def close(self):
+        """
+        Close the session and all pooled connections. Requests in flight on other threads fail right away and are not
+        retried, requests made after closing open a new session
+        """
+        self.balancer.stop_health_checks()
+        session = self._session
+        if session is not None:
+            self._session = None
+            for adapter in session.adapters.values():
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if hasattr(pool, "abort"):
+                        pool.abort()
+            session.close()
+
+    @property
+    def stats(self):
+        """
+        Retry and failover counters and the state of every replica
+        """
+        return {"retries": self.retries, "failovers": self.failovers, "servers": self.balancer.stats}
+
+    def _check(self, replica):
+        """
+        Health check of a replica, the test route must answer with a successful json response. Fails without a session
+        instead of creating one, so a check still running after close doesn't open the client again
+        """
+        from requests.exceptions import RequestException
+        from item_client import serializer
+
+        session = self._session
+        if session is None:
+            return False
+        try:
+            resp = session.get(URL_TEST.format(replica.url_prefix),
+                                    timeout=(self.timeout[0], DEFAULT_HEALTH_CHECK_TIMEOUT))
+            return resp.status_code < 500 and serializer.loads(resp.content).get("result") is True
+        except (RequestException, ValueError, AttributeError):
+            return False
+
+    def _emit(self, info):
+        for hook in self.hooks:
+            try:
+                hook(info)
+            except Exception as e:
+                LOGGER.error(f"Request hook failed: {e}")
+
+    def _send_once(self, session, replica, method, endpoint, path, timeout, **kwargs):
+        from requests.exceptions import RequestException
+        from item_client.exceptions import ServerError
+        from item_client.metrics import RequestInfo, connect_time, reset_connect_time
+
+        info = RequestInfo(method, endpoint, replica.url_prefix)
+        reset_connect_time()
+        start = time.perf_counter()
+        success = False
+        try:
+            resp = session.request(method, replica.url_prefix + path, timeout=timeout, **kwargs)
+            info.status = resp.status_code
+            info.bytes_sent = len(resp.request.body or b"")
+            info.bytes_received = len(resp.content)
+            info.ttfb = resp.elapsed.total_seconds()
+            if resp.status_code >= 500:
+                raise ServerError(resp.status_code, resp.text)
+            success = True
+        except (RequestException, ServerError) as e:
+            if self.hooks:
+                info.error = type(e).__name__
+                info.connect = connect_time()
+                info.total = time.perf_counter() - start
+                self._emit(info)
+            raise
+        finally:
+            self.balancer.release(replica, success)
+        info.connect = connect_time()
+        info.total = time.perf_counter() - start
+        # Hooks are called once the body is decoded
+        resp.request_info = info
+        return resp
+
+    def _send(self, method, endpoint, path, **kwargs):
+        from requests.exceptions import RequestException
+        from item_client.exceptions import CircuitOpenError, DeadlineExceeded, ServerError
+
+        idempotent = method in IDEMPOTENT_METHODS
+        max_retries = self.retry.max_retries if self.retry is not None else 0
+        deadline = time.monotonic() + self.deadline if self.deadline else None
+        retry = 0
+        tried = []
+        session = self.session
+        while True:
+            timeout = self.timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"{method} {path} did not complete within {self.deadline}s")
+                timeout = tuple(min(t, remaining) for t in self.timeout)
+            try:
+                replica = self.balancer.acquire(tried)
+            except CircuitOpenError as e:
+                # Nothing was sent so any request can wait for a breaker to let a trial request through, which counts
+                # as a retry. Without waiting at least the backoff, requests losing to the trial request of a half
+                # open breaker would use up their retries right away
+                if retry >= max_retries or self._session is not session:
+                    raise
+                delay = max(e.retry_after, self.retry.delay(retry))
+                if deadline is not None:
+                    delay = min(delay, deadline - time.monotonic())
+                retry += 1
+                self.retries += 1
+                LOGGER.warning("%s %s failed, retry %d/%d in %.2fs: %s", method, path, retry, max_retries, delay, e)
+                time.sleep(max(delay, 0))
+                continue
+            try:
+                return self._send_once(session, replica, method, endpoint, path, timeout, **kwargs)
+            except (RequestException, ServerError) as e:
+                retryable = idempotent or _not_connected(e)
+                if not retryable or self._session is not session:
+                    # Also when the client was closed while the request was in flight
+                    raise
+                tried.append(replica)
+                if len(tried) < len(self.balancer):
+                    self.failovers += 1
+                    LOGGER.warning("%s %s%s failed, trying another server: %s", method, replica.url_prefix, path, e)
+                    continue
+                if retry >= max_retries:
+                    raise
+                delay = self.retry.delay(retry)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    raise
+                retry += 1
+                self.retries += 1
+                LOGGER.warning("%s %s%s failed, retry %d/%d in %.2fs: %s", method, replica.url_prefix, path, retry,
+                               max_retries, delay, e)
+                time.sleep(delay)
+
+    def _decode(self, resp):
+        from item_client import serializer
+        from item_client.exceptions import ServerError
+
+        info = resp.request_info
+        start = time.perf_counter()
+        try:
+            return Response(serializer.decode_response(resp.content, self.account_factory))
+        except ValueError:
+            info.error = ServerError.__name__
+            raise ServerError(resp.status_code, resp.text)
+        finally:
+            info.decode = time.perf_counter() - start
+            self._emit(info)
+
+    def _request(self, method, endpoint, path, **kwargs):
+        return self._decode(self._send(method, endpoint, path, **kwargs))
+
+    def _cached_get(self, key, endpoint, path):
+        if self.cache is None:
+            return self._request("GET", endpoint, path)
+
+        entry = self.cache.get(key)
+        if entry is not None and entry.fresh:
+            return entry.value
+
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        resp = self._send("GET", endpoint, path, headers=headers)
+        if resp.status_code == 304:
+            self._emit(resp.request_info)
+            self.cache.revalidated(key)
+            return entry.value
+
+        res = self._decode(resp)
+        if res.result:
+            etag = resp.headers.get("ETag")
+            self.etags_supported = etag is not None
+            self.cache.put(key, res, etag)
+        else:
+            self.cache.invalidate(key)
+        return res
+
+    def _invalidate(self, account_id):
+        if self.cache is not None:
+            self.cache.invalidate((CACHE_ACCOUNT, account_id))
+            self.cache.invalidate_prefix(CACHE_ACCOUNTS)
+
     def test(self):
-        return Response(requests.get("{}/api/v1/test".format(self.url_prefix)).json())
+        return self._request("GET", "test", PATH_TEST)
 
     def get_account(self, account_id):
-        return Response(requests.get(f"{self.url_prefix}/api/v1/account/{account_id}").json())
+        account_id = int(account_id)
+        return self._cached_get((CACHE_ACCOUNT, account_id), "account", PATH_ACCOUNT.format(account_id))
 
     def get_accounts(self, n=0):
-        return Response(requests.get(f"{self.url_prefix}/api/v1/accounts/{n}").json())
+        n = int(n)
+        return self._cached_get((CACHE_ACCOUNTS, n), "accounts", PATH_ACCOUNTS.format(n))
+
+    def iter_account_pages(self, page_size=DEFAULT_PAGE_SIZE, prefetch=True):
+        """
+        Fetch all accounts a page at a time, in the same order as get_accounts.
+
+        Pages are requested with an offset. Servers that do not support offsets are detected when the second page
+        starts with the same account as the first, the remaining accounts are then taken from a single full fetch.
+        :param int page_size: Number of accounts per request
+        :param bool prefetch: Fetch the next page in the background while the current one is consumed
+        :return: generator of lists of accounts
+        """
+        if page_size < 1:
+            raise ValueError("Invalid page size")
+
+        def fetch(offset):
+            return self._request("GET", "accounts_page", PATH_ACCOUNTS_PAGE.format(page_size, offset))
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            offset = 0
+            first = None
+            next_page = None
+            while True:
+                res = next_page.result() if next_page is not None else fetch(offset)
+                next_page = None
+                if not res.result:
+                    LOGGER.warning(f"Could not get accounts at offset {offset}: {res.message}")
+                    return
+                page = res.data
+                if offset and page and page[0] == first:
+                    LOGGER.warning("Server does not support paging, fetching all accounts")
+                    res = self.get_accounts()
+                    rest = res.data[offset:] if res.result else []
+                    for start in range(0, len(rest), page_size):
+                        yield rest[start:start + page_size]
+                    return
+                if first is None and page:
+                    first = page[0]
+
+                offset += len(page)
+                is_last = len(page) < page_size
+                if not is_last and executor is not None:
+                    next_page = executor.submit(fetch, offset)
+                if page:
+                    yield page
+                if is_last:
+                    return
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_accounts(self, page_size=DEFAULT_PAGE_SIZE, prefetch=True):
+        """
+        Same as iter_account_pages but yields accounts one at a time
+        """
+        for page in self.iter_account_pages(page_size, prefetch):
+            yield from page
 
     def add_account(self, account_info):
-        return Response(requests.post(f"{self.url_prefix}/api/v1/accounts/add", data=json.dumps(account_info)).json())
+        from item_client import serializer
+
+        res = self._request("POST", "add", PATH_ADD, data=serializer.dumps(account_info))
+        self._invalidate(account_info.get("orgno"))
+        return res
+
+    def edit_account(self, account_info, base=None):
+        """
+        :param account_info: The account or only the fields to change, orgno is always required
+        :param base: The account as it was loaded before editing. If given the edit is only applied if the account is
+            unchanged on the server, otherwise the response has conflict set. This needs a server that supports If-Match
+            and answers edits with an ETag, a warning is logged if the server doesn't
+        :return: Response with the edited account as data, if the server returns it
+        """
+        from item_client import serializer
+        from item_client.records import account_version
 
-    def edit_account(self, account_info):
         account_id = account_info.get("orgno")
-        return Response(requests.put(f"{self.url_prefix}/api/v1/accounts/edit/{account_id}", data=json.dumps(account_info)).json())
+        headers = {"If-Match": account_version(base)} if base is not None else {}
+        resp = self._send("PUT", "edit", PATH_EDIT.format(account_id), data=serializer.dumps(account_info),
+                          headers=headers)
+        res = self._decode(resp)
+        if base is not None and res.result and "ETag" not in resp.headers:
+            # The server ignored If-Match, the edit was applied even if someone else changed the account
+            LOGGER.warning("%s does not support conditional edits, account %s may have overwritten changes made by "
+                           "others", resp.url, account_id)
+        if resp.status_code == 412:
+            current = res.data
+            if current and all(current.get(field) == value for field, value in account_info.items()):
+                # The account already has these values, e.g. this was a retry of an edit that was applied
+                res["result"] = True
+                res.pop("conflict", None)
+            else:
+                res["conflict"] = True
+        self._invalidate(account_id)
+        return res
 
     def delete_account(self, account_id):
-        return Response(requests.delete(f"{self.url_prefix}/api/v1/accounts/delete/{account_id}").json())
+        res = self._request("DELETE", "delete", PATH_DELETE.format(account_id))
+        self._invalidate(account_id)
+        return res
+
+
+def quick_test(host, port, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT):
+    """
+    Same as ItemClient.test using only the standard library and a single HTTP/1.0 request, for health checks where
+    starting up quickly matters more than pooled connections or metrics
+    :raises OSError: if the server could not be reached or did not answer in time
+    :raises ValueError: if the server did not answer with a json response
+    """
+    import socket
+
+    with socket.create_connection((host, port), timeout=connect_timeout) as sock:
+        sock.settimeout(read_timeout)
+        sock.sendall(f"GET {PATH_TEST} HTTP/1.0\r\nHost: {host}:{port}\r\n\r\n".encode())
+        chunks = []
+        chunk = sock.recv(65536)
+        while chunk:
+            chunks.append(chunk)
+            chunk = sock.recv(65536)
+    head, _, body = b"".join(chunks).partition(b"\r\n\r\n")
+    status_line = head.split(b"\r\n", 1)[0].split()
+    if len(status_line) < 2 or not status_line[1].isdigit():
+        raise ValueError(f"Invalid response from {host}:{port}")
+    status = int(status_line[1])
+    if status >= 500:
+        raise ValueError(f"Server error {status}")
+    return Response(json.loads(body))
+
+def run_quick_test(args, addresses):
+    """
+    Run the test command with quick_test against every server, retrying like ItemClient would
+    :return: exit code, 1 if any server failed
+    """
+    retry = RetryPolicy(max_retries=args.retries)
+    failed = 0
+    for host, port in addresses:
+        for attempt in range(args.retries + 1):
+            try:
+                LOGGER.info(quick_test(host, port, args.connect_timeout, args.read_timeout))
+                break
+            except (OSError, ValueError) as e:
+                if attempt == args.retries:
+                    LOGGER.error(f"Request to {host}:{port} failed: {e}")
+                    failed = 1
+                    break
+                delay = retry.delay(attempt)
+                LOGGER.warning(f"Test of {host}:{port} failed, retry {attempt + 1}/{args.retries} in {delay:.2f}s: {e}")
+                time.sleep(delay)
+    return failed
+
+def offline(store, args):
+    """
+    Answer account and accounts commands from a snapshot, responses have an extra "stale" field with the age of the
+    snapshot in seconds
+    """
+    age = store.age
+    if age is None:
+        LOGGER.error(f"No snapshot at {store.path}, run the sync command first")
+        sys.exit(1)
+    LOGGER.warning(f"Offline, using snapshot synced {age:.0f} seconds ago")
+
+    if args.command == "account":
+        account = store.get_account(args.account_id)
+        if account is None:
+            res = Response(result=False, message=f"Account {args.account_id} not in snapshot", stale=age)
+        else:
+            res = Response(result=True, message=f"Account {args.account_id} found in snapshot", data=account, stale=age)
+    else:
+        accounts = store.get_accounts(args.number or 0)
+        res = Response(result=True, message=f"{len(accounts)} accounts found in snapshot", data=accounts, stale=age)
+    LOGGER.info(res)
+
+def write_metrics(registry, path, metrics_format):
+    text = registry.to_prometheus() if metrics_format == "prometheus" else registry.to_json()
+    if path == "-":
+        print(text)
+    else:
+        with open(path, "w") as metrics_file:
+            metrics_file.write(text)
+
+def run_command(client, args, snapshot_path):
+    if args.command == "test":
+        LOGGER.info(client.test())
+    elif args.command == "account":
+        LOGGER.info(client.get_account(args.account_id))
+    elif args.command == "accounts":
+        if args.page_size:
+            accounts = client.iter_accounts(args.page_size)
+            if args.number:
+                accounts = itertools.islice(accounts, int(args.number))
+            for account in accounts:
+                LOGGER.info(account)
+        elif args.number:
+            LOGGER.info(client.get_accounts(args.number))
+        else:
+            LOGGER.info(client.get_accounts())
+    elif args.command == "add":
+        if args.data:
+            LOGGER.info(client.add_account(json.loads(args.data)))
+        elif args.file_path:
+            data = None
+            with open(args.file_path) as json_file:
+                data = json.load(json_file)
+            LOGGER.info(client.add_account(data))
+    elif args.command == "edit":
+        if args.data:
+            LOGGER.info(client.edit_account(json.loads(args.data)))
+        elif args.file_path:
+            data = None
+            with open(args.file_path) as json_file:
+                data = json.load(json_file)
+            LOGGER.info(client.edit_account(data))
+    elif args.command == "delete":
+        LOGGER.info(client.delete_account(args.account_id))
+    elif args.command in BULK_COMMANDS:
+        input_stream = sys.stdin if args.file_path == "-" else open(args.file_path)
+        output_stream = sys.stdout if args.output == "-" else open(args.output, "w")
+        try:
+            _, failed = run_bulk(client, args.command, input_stream, output_stream, args.concurrency)
+        finally:
+            if input_stream is not sys.stdin:
+                input_stream.close()
+            if output_stream is not sys.stdout:
+                output_stream.close()
+        if failed:
+            sys.exit(1)
+    elif args.command == "sync":
+        res = client.get_accounts()
+        if res.result:
+            accounts = to_records(res.data)
+            from item_client.snapshot import SnapshotStore
+
+            SnapshotStore(snapshot_path).save(accounts)
+            LOGGER.info(f"Saved {len(accounts)} accounts to {snapshot_path}")
+        else:
+            LOGGER.error(res)
+            sys.exit(1)
+    elif args.command == "bench":
+        benchmark = bench.Benchmark(client, mix=args.mix, concurrency=args.concurrency, duration=args.duration,
+                                    rate=args.rate, orgnos=args.orgnos)
+        report = benchmark.run()
+        LOGGER.info("Benchmark results\n" + bench.format_table(report))
+        if args.json_output == "-":
+            print(bench.format_json(report))
+        elif args.json_output:
+            with open(args.json_output, "w") as json_file:
+                json_file.write(bench.format_json(report))
+
+
+def _split(value):
+    return value.split(",")
 
 def main():
     parser = argparse.ArgumentParser(description="Item's Client")
     parser.add_argument("-v", "--verbose", action="store_true", help="increase log output verbosity")
-    parser.add_argument('--ip', '-i', type=str, default="127.0.0.1", help="The Rest API server's ip address")
-    parser.add_argument('--port', '-p', type=int, default=8080, help="The Rest API server's port")
+    parser.add_argument('--ip', '-i', type=_split, default="127.0.0.1", help="The Rest API server's ip address, or comma separated ip addresses of several replicas")
+    parser.add_argument('--port', '-p', type=_split, default="8080", help="The Rest API server's port, or comma separated ports matching --ip")
+    parser.add_argument('--balancing', choices=STRATEGIES, default=ROUND_ROBIN, help="How requests are spread over several replicas")
     parser.add_argument('--log-file', '-l', type=str, help="Output logs to specified file")
+    parser.add_argument('--log-json', action="store_true", help="Output logs as one json object per line")
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE, help="Maximum number of pooled connections")
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT, help="Connect timeout in seconds")
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT, help="Read timeout in seconds")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRY.max_retries, help="Times to retry failed requests, 0 to never retry")
+    parser.add_argument('--deadline', type=float, help="Maximum seconds for a request including retries")
+    parser.add_argument('--metrics', '-m', type=str, help="Write request metrics to this file when done, use - for stdout")
+    parser.add_argument('--metrics-format', choices=["json", "prometheus"], default="json", help="Format of the request metrics")
+    parser.add_argument('--snapshot', type=str, help="Snapshot file of the last known accounts, defaults to one per server in the home directory")
+    parser.add_argument('--offline', action="store_true", help="Answer account and accounts from the snapshot instead of the server")
 
     subparsers = parser.add_subparsers(title="command", dest="command", help="Command Type")
 
@@ -98,6 +693,7 @@ def main():
 
     parser_accounts = subparsers.add_parser("accounts", help="Get all accounts or get n accounts if n is provided, accounts will be in alphabetical order")
     parser_accounts.add_argument("--number", "-n", help="Number of accounts to retrieve")
+    parser_accounts.add_argument("--page-size", "-s", type=int, help="Fetch accounts in pages of this size and output them as they arrive")
 
     parser_add = subparsers.add_parser("add", help="Add an account")
     parser_add.add_argument("--data", "-d", type=str, help="Account information in json format")
@@ -110,6 +706,27 @@ def main():
     parser_delete = subparsers.add_parser("delete", help="Given account id, delete account info")
     parser_delete.add_argument("--account-id", "-a", type=int, required=True, help="Account ID")
 
+    bulk_help = {
+        BULK_ADD: "Add accounts from newline delimited json",
+        BULK_EDIT: "Edit accounts from newline delimited json",
+        BULK_DELETE: "Delete accounts from newline delimited json, one account or orgno per line",
+    }
+    for command in BULK_COMMANDS:
+        parser_bulk = subparsers.add_parser(command, help=bulk_help[command])
+        parser_bulk.add_argument("--file-path", "-f", default="-", help="Input file, defaults to stdin")
+        parser_bulk.add_argument("--output", "-o", default="-", help="File to write per record results to, defaults to stdout")
+        parser_bulk.add_argument("--concurrency", "-c", type=int, default=DEFAULT_CONCURRENCY, help="Number of requests to send in parallel")
+
+    parser_sync = subparsers.add_parser("sync", help="Save all accounts to the snapshot for offline use")
+
+    parser_bench = subparsers.add_parser("bench", help="Benchmark the server with a mix of requests and report latencies")
+    parser_bench.add_argument("--mix", "-m", default=bench.DEFAULT_MIX, help=f"Weighted endpoints to call, any of {bench.ENDPOINTS}. Defaults to {bench.DEFAULT_MIX}")
+    parser_bench.add_argument("--concurrency", "-c", type=int, default=bench.DEFAULT_CONCURRENCY, help="Number of parallel workers")
+    parser_bench.add_argument("--duration", "-d", type=float, default=bench.DEFAULT_DURATION, help="Duration of the benchmark in seconds")
+    parser_bench.add_argument("--rate", "-r", type=float, help="Target total requests per second, unlimited if not given")
+    parser_bench.add_argument("--orgnos", default=bench.DEFAULT_ORGNOS, help="Range of orgnos used by account, edit and delete, e.g. 1-1000. Added accounts are numbered after this range and the accounts on the server")
+    parser_bench.add_argument("--json-output", "-o", help="Write the report as json to this file, use - for stdout")
+
     args = parser.parse_args()
 
     # Sanitize arguments
@@ -121,50 +738,63 @@ def main():
         # Check if path is valid
         dir_path = os.path.dirname(os.path.abspath(args.log_file))
         if dir_path:
-            setup_logging(args.log_file, log_level)
+            setup_logging(args.log_file, log_level, json_format=args.log_json)
     else:
-        setup_logging(level=log_level)
+        setup_logging(level=log_level, json_format=args.log_json)
 
-    if args.ip:
+    for ip in args.ip:
         try:
-            ipaddress.ip_address(args.ip)
+            ipaddress.ip_address(ip)
         except ValueError as e:
             LOGGER.error(f"Invalid IP address: {e}")
             sys.exit(1)
-    if args.port:
-        if not (1 <= args.port <= 65535):
-            LOGGER.error(f"Invalid port: {args.port}")
+    for port in args.port:
+        if not port.isdigit() or not (1 <= int(port) <= 65535):
+            LOGGER.error(f"Invalid port: {port}")
             sys.exit(1)
-
-    client = ItemClient(args.ip, args.port)
-    if args.command == "test":
-        LOGGER.info(client.test())
-    elif args.command == "account":
-        LOGGER.info(client.get_account(args.account_id))
-    elif args.command == "accounts":
-        if args.number:
-            LOGGER.info(client.get_accounts(args.number))
-        else:
-            LOGGER.info(client.get_accounts())
-    elif args.command == "add":
-        if args.data:
-            LOGGER.info(client.add_account(json.loads(args.data)))
-        elif args.file_path:
-            data = None
-            with open(args.file_path) as json_file:
-                data = json.load(json_file)
-            LOGGER.info(client.add_account(data))
-    elif args.command == "edit":
-        if args.data:
-            LOGGER.info(client.edit_account(json.loads(args.data)).text)
-        elif args.file_path:
-            data = None
-            with open(args.file_path) as json_file:
-                data = json.load(json_file)
-            LOGGER.info(client.edit_account(data))
-    elif args.command == "delete":
-        LOGGER.info(client.delete_account(args.account_id))
-
+    args.port = [int(port) for port in args.port]
+    try:
+        addresses = parse_addresses(args.ip, args.port)
+    except ValueError as e:
+        LOGGER.error(e)
+        sys.exit(1)
+
+    if args.command == "test" and not (args.offline or args.metrics or args.deadline):
+        sys.exit(run_quick_test(args, addresses))
+
+    from requests.exceptions import RequestException
+    from item_client.exceptions import ItemClientError
+    from item_client.metrics import MetricsHook
+    from item_client.snapshot import SnapshotStore, default_snapshot_path
+
+    # Replicas share the same accounts, the snapshot is named after the first one
+    snapshot_path = args.snapshot or default_snapshot_path(*addresses[0])
+    if args.offline:
+        if args.command not in ["account", "accounts"]:
+            LOGGER.error(f"Command {args.command} is not available offline")
+            sys.exit(1)
+        offline(SnapshotStore(snapshot_path), args)
+        return
+
+    pool_size = args.pool_size
+    if args.command in BULK_COMMANDS or args.command == "bench":
+        pool_size = max(pool_size, args.concurrency)
+
+    # Benchmarks time every request sent to the server, retries and breaker rejections would skew the latencies
+    benchmark = args.command == "bench"
+    retry = RetryPolicy(max_retries=args.retries) if args.retries and not benchmark else None
+    hooks = [MetricsHook()] if args.metrics else []
+    with ItemClient(args.ip, args.port, pool_size=pool_size, connect_timeout=args.connect_timeout,
+                    read_timeout=args.read_timeout, retry=retry, breaker=not benchmark, deadline=args.deadline,
+                    hooks=hooks, balancing=args.balancing) as client:
+        try:
+            run_command(client, args, snapshot_path)
+        except (RequestException, ItemClientError) as e:
+            LOGGER.error(f"Request failed: {e}")
+            sys.exit(1)
+        finally:
+            if args.metrics:
+                write_metrics(hooks[0].registry, args.metrics, args.metrics_format)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,20 +1,94 @@
+import atexit
+import json
 import logging
+import queue
+
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 LOGGER = logging.getLogger()
 
-def setup_logging(filename=None, level=logging.INFO):
-    log_format = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+_queue_handler = None
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One json object per line with time, level, logger and message, and the traceback if there is one
+    """
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    Queues records as they are, so their messages are formatted on the writer thread instead of by the caller.
+    Arguments of log calls must not be changed after logging them
+    """
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(filename=None, level=logging.INFO, json_format=False, max_bytes=DEFAULT_MAX_BYTES,
+                  backup_count=DEFAULT_BACKUP_COUNT):
+    """
+    Log to the console and optionally to a file, without blocking the caller.
 
+    Log calls only put records on a queue, a background thread formats and writes them. Calling this again replaces
+    the previous setup instead of adding more handlers, and queued records are written at exit.
+    :param filename: Also log to this file, which is rotated when it reaches max_bytes (0 to never rotate) keeping
+        backup_count old files
+    :param json_format: Write one json object per line instead of plain text
+    """
+    global _queue_handler, _listener
+
+    stop_logging()
+    log_format = JsonFormatter() if json_format else logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler()]
     if filename:
-        file_handler = logging.FileHandler(filename, 'a')
-        file_handler.setFormatter(log_format)
-        LOGGER.addHandler(file_handler)
+        handlers.append(RotatingFileHandler(filename, "a", maxBytes=max_bytes, backupCount=backup_count,
+                                            encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(log_format)
 
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(log_format)
-    LOGGER.addHandler(console_handler)
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _DeferredQueueHandler(log_queue)
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    LOGGER.addHandler(_queue_handler)
     LOGGER.setLevel(level)
 
+
+def stop_logging():
+    """
+    Write all queued records and remove the handlers added by setup_logging
+    """
+    global _queue_handler, _listener
+
+    if _queue_handler is not None:
+        LOGGER.removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
 def test_logger():
     setup_logging("test-logfile.log")
     logger = logging.getLogger(__name__) #ensure module name
@@ -4,4 +4,11 @@ FIELD_ORGNO = "orgno"
 FIELD_LEADER_TITLE = "leader_title"
 FIELD_LEADER_NAME = "leader_name"
 FIELD_TYPE = "type"
-ACCOUNT_FIELDS = [FIELD_NAME, FIELD_ORGNO, FIELD_LEADER_TITLE, FIELD_LEADER_NAME, FIELD_TYPE]
\ No newline at end of file
+ACCOUNT_FIELDS = [FIELD_NAME, FIELD_ORGNO, FIELD_LEADER_TITLE, FIELD_LEADER_NAME, FIELD_TYPE]
+ACCOUNT_FIELD_TYPES = {
+    FIELD_NAME: str,
+    FIELD_ORGNO: int,
+    FIELD_LEADER_TITLE: str,
+    FIELD_LEADER_NAME: str,
+    FIELD_TYPE: str,
+}
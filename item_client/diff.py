@@ -0,0 +1,41 @@
+class AccountDiff:
+    """
+    Difference between the accounts currently known and a freshly fetched set of accounts, keyed by orgno
+    """
+    def __init__(self, added=None, removed=None, changed=None, unchanged=0):
+        self.added = added if added is not None else []
+        self.removed = removed if removed is not None else []
+        self.changed = changed if changed is not None else []
+        self.unchanged = unchanged
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self):
+        return (f"AccountDiff(added={len(self.added)}, removed={len(self.removed)}, "
+                f"changed={len(self.changed)}, unchanged={self.unchanged})")
+
+
+def diff_accounts(current: dict, accounts):
+    """
+    Compare accounts against current
+    :param dict current: Known accounts keyed by orgno
+    :param accounts: Complete list of fetched AccountRecords
+    :return: AccountDiff with added and changed accounts and the orgnos of removed accounts
+    """
+    diff = AccountDiff()
+    seen = set()
+    for account in accounts:
+        orgno = account.orgno
+        seen.add(orgno)
+        known = current.get(orgno)
+        if known is None:
+            diff.added.append(account)
+        elif known != account:
+            diff.changed.append(account)
+        else:
+            diff.unchanged += 1
+    # Every known account that was seen is either changed or unchanged, anything else was removed
+    if len(diff.changed) + diff.unchanged != len(current):
+        diff.removed = [orgno for orgno in current if orgno not in seen]
+    return diff
@@ -0,0 +1,33 @@
+from requests.exceptions import ConnectionError
+
+
+class ItemClientError(Exception):
+    """
+    Base class of errors raised by ItemClient
+    """
+
+
+class ServerError(ItemClientError):
+    """
+    Server answered with an error status or a body that is not json
+    """
+    def __init__(self, status_code, text):
+        super().__init__(f"Server error {status_code}: {text[:200]}")
+        self.status_code = status_code
+        self.text = text
+
+
+class CircuitOpenError(ItemClientError, ConnectionError):
+    """
+    Request was not sent because the server failed too often recently, it will be tried again after retry_after seconds
+    """
+    def __init__(self, host, retry_after):
+        super().__init__(f"Server {host} is unavailable, retrying in {retry_after:.1f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(ItemClientError):
+    """
+    Request including all retries took longer than the deadline
+    """
@@ -0,0 +1,333 @@
+"""
+In-memory stand-in for the Item-RestAPI server, useful for benchmarks and testing without a real server.
+
+Implements the same routes and {id, result, message, data} response envelope as the real server, with optional
+injected latency and error rate. Run it with
+    python -m item_client.fake_server --port 8080 --accounts 100000
+or start it from python
+    with FakeItemServer(generate_accounts(1000)) as server:
+        client = ItemClient(server.host, server.port)
+"""
+import argparse
+import hashlib
+import itertools
+import logging
+import random
+import re
+import socket
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from item_client import serializer
+from item_client.config import setup_logging
+from item_client.constants import *
+from item_client.records import account_version
+from item_client.validation import validate_account
+
+LOGGER = logging.getLogger(__name__)
+
+ROUTES = [
+    ("GET", re.compile(r"^/api/v1/test$"), "test"),
+    ("GET", re.compile(r"^/api/v1/account/(?P<account_id>-?\d+)$"), "get_account"),
+    ("GET", re.compile(r"^/api/v1/accounts(?:/(?P<number>\d+))?$"), "get_accounts"),
+    ("POST", re.compile(r"^/api/v1/accounts/add$"), "add_account"),
+    ("PUT", re.compile(r"^/api/v1/accounts/edit/(?P<account_id>-?\d+)$"), "edit_account"),
+    ("DELETE", re.compile(r"^/api/v1/accounts/delete/(?P<account_id>-?\d+)$"), "delete_account"),
+]
+
+
+def generate_accounts(n, start=1):
+    """
+    Generate n valid accounts with orgnos starting at start
+    """
+    return [
+        {
+            FIELD_NAME: f"company{orgno:08d}",
+            FIELD_ORGNO: orgno,
+            FIELD_LEADER_TITLE: "manager",
+            FIELD_LEADER_NAME: f"leader{orgno}",
+            FIELD_TYPE: "industrial" if orgno % 2 else "retail",
+        }
+        for orgno in range(start, start + n)
+    ]
+
+
+class AccountStore:
+    """
+    Thread safe in-memory account storage keyed by orgno
+    """
+    def __init__(self, accounts=()):
+        self._lock = threading.Lock()
+        self._accounts = {account[FIELD_ORGNO]: dict(account) for account in accounts}
+        self._sorted = None
+        self._packet_ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self._accounts)
+
+    def _response(self, result, message, data=None):
+        resp = {"id": next(self._packet_ids), "result": result, "message": message}
+        if data is not None:
+            resp["data"] = data
+        return resp
+
+    def test(self, body=None):
+        return self._response(True, "Test successful")
+
+    def get_account(self, account_id, body=None):
+        account = self._accounts.get(int(account_id))
+        if account is None:
+            return self._response(False, f"Account {account_id} does not exist")
+        return self._response(True, f"Account {account_id} found", dict(account))
+
+    def get_accounts(self, number=None, offset=None, body=None):
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = sorted(self._accounts.values(), key=lambda account: account[FIELD_NAME])
+            accounts = self._sorted
+        number = int(number or 0)
+        offset = int(offset or 0)
+        if offset:
+            accounts = accounts[offset:]
+        if number:
+            accounts = accounts[:number]
+        return self._response(True, f"{len(accounts)} accounts found", accounts)
+
+    def add_account(self, body=None):
+        if not isinstance(body, dict) or not validate_account(body):
+            return self._response(False, "Invalid account information")
+        orgno = body[FIELD_ORGNO]
+        with self._lock:
+            if orgno in self._accounts:
+                return self._response(False, f"Account {orgno} already exists")
+            self._accounts[orgno] = {field: body[field] for field in ACCOUNT_FIELDS}
+            self._sorted = None
+        return self._response(True, f"Account {orgno} added successfully")
+
+    def edit_account(self, account_id, body=None, if_match=None):
+        """
+        Update the fields given in body, others are kept. If if_match is given the edit is only applied if it matches
+        the account_version of the stored account, otherwise the response has conflict set and the stored account
+        :return: response with the edited account
+        """
+        account_id = int(account_id)
+        if not isinstance(body, dict):
+            return self._response(False, "Invalid account information")
+        with self._lock:
+            if account_id not in self._accounts:
+                return self._response(False, f"Account {account_id} does not exist")
+            current = self._accounts[account_id]
+            if if_match is not None and if_match != account_version(current):
+                resp = self._response(False, f"Account {account_id} was changed by someone else", dict(current))
+                resp["conflict"] = True
+                return resp
+            account = dict(current)
+            account.update({field: body[field] for field in ACCOUNT_FIELDS if field in body and field != FIELD_ORGNO})
+            if not validate_account(account):
+                return self._response(False, "Invalid account information")
+            self._accounts[account_id] = account
+            self._sorted = None
+        return self._response(True, f"Account {account_id} edited successfully", dict(account))
+
+    def delete_account(self, account_id, body=None):
+        account_id = int(account_id)
+        with self._lock:
+            if self._accounts.pop(account_id, None) is None:
+                return self._response(False, f"Account {account_id} does not exist")
+            self._sorted = None
+        return self._response(True, f"Account {account_id} deleted successfully")
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, without this small responses wait for delayed acks of the headers
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        LOGGER.debug(format, *args)
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and server.random.random() < server.error_rate:
+            # Mimic an unhandled server error, which is not json
+            self._send(500, b"500 Internal Server Error", "text/plain")
+            return
+
+        path, _, query = self.path.partition("?")
+        for method, pattern, handler in ROUTES:
+            match = pattern.match(path)
+            if method == self.command and match:
+                break
+        else:
+            self._send(404, b"404: Not Found", "text/plain")
+            return
+
+        try:
+            body = serializer.loads(raw_body) if raw_body else None
+        except ValueError:
+            body = None
+        params = match.groupdict()
+        if handler == "get_accounts":
+            params["offset"] = parse_qs(query).get("offset", [None])[0]
+        elif handler == "edit_account":
+            params["if_match"] = self.headers.get("If-Match")
+        resp = getattr(server.store, handler)(body=body, **params)
+        if resp.get("conflict"):
+            self._send(412, serializer.dumps(resp))
+            return
+
+        headers = {}
+        if server.etags and self.command == "GET" and "data" in resp:
+            # Only the data identifies the content, the packet id changes on every response
+            etag = '"{}"'.format(hashlib.sha1(serializer.dumps(resp["data"])).hexdigest())
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, b"", headers={"ETag": etag})
+                return
+            headers["ETag"] = etag
+        elif handler == "edit_account" and resp.get("data"):
+            # Tells clients the If-Match precondition is supported, with the version of the edited account
+            headers["ETag"] = account_version(resp["data"])
+        self._send(200, serializer.dumps(resp), headers=headers)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    """
+    Keeps track of open connections so stopping the server drops them, like a server going down would
+    """
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections = set()
+        self.connections_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self.connections_lock:
+            self.connections.add(request)
+        super().process_request(request, client_address)
+
+    def shutdown_request(self, request):
+        with self.connections_lock:
+            self.connections.discard(request)
+        super().shutdown_request(request)
+
+    def handle_error(self, request, client_address):
+        # Clients going away mid request, e.g. a benchmark or a failover test stopping, are expected
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, ConnectionAbortedError, BrokenPipeError)):
+            LOGGER.debug("Connection from %s:%s dropped", *client_address[:2])
+            return
+        super().handle_error(request, client_address)
+
+    def close_connections(self):
+        with self.connections_lock:
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class FakeItemServer:
+    """
+    Runs an AccountStore behind an HTTP server on a background thread.
+
+    Port 0 picks a free port, the actual port is available as server.port once constructed.
+    :param float latency: seconds to sleep before handling each request
+    :param float error_rate: fraction of requests answered with a non-json 500 error
+    :param AccountStore store: Serve this store instead of one with accounts, servers sharing a store act as replicas
+    :param bool etags: Send ETags with GET responses and answer conditional requests, the Item-RestAPI server doesn't
+    """
+    def __init__(self, accounts=(), host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, seed=None, store=None,
+                 etags=True):
+        self.store = store if store is not None else AccountStore(accounts)
+        self._httpd = _HTTPServer((host, port), _RequestHandler)
+        self._httpd.store = self.store
+        self._httpd.latency = latency
+        self._httpd.error_rate = error_rate
+        self._httpd.etags = etags
+        self._httpd.random = random.Random(seed)
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def host(self):
+        return self._httpd.server_address[0]
+
+    @property
+    def port(self):
+        return self._httpd.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        LOGGER.info(f"Fake server listening on {self.host}:{self.port} with {len(self.store)} accounts")
+
+    def serve_forever(self):
+        LOGGER.info(f"Fake server listening on {self.host}:{self.port} with {len(self.store)} accounts")
+        self._httpd.serve_forever()
+
+    def stop(self):
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+        self._httpd.close_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory fake Item-RestAPI server")
+    parser.add_argument("-v", "--verbose", action="store_true", help="increase log output verbosity")
+    parser.add_argument('--ip', '-i', type=str, default="127.0.0.1", help="Address to listen on")
+    parser.add_argument('--port', '-p', type=int, default=8080, help="Port to listen on")
+    parser.add_argument('--accounts', '-n', type=int, default=0, help="Number of generated accounts to start with")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds of latency added to every request")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests that fail with a 500 error")
+    parser.add_argument('--no-etags', action="store_true", help="Do not send ETags with GET responses, like the Item-RestAPI server")
+    parser.add_argument('--replicas', '-r', type=int, default=1, help="Number of servers sharing the accounts, on consecutive ports")
+    args = parser.parse_args()
+
+    setup_logging(level=logging.DEBUG if args.verbose else logging.INFO)
+    store = AccountStore(generate_accounts(args.accounts))
+    servers = [FakeItemServer(host=args.ip, port=args.port + i, latency=args.latency, error_rate=args.error_rate,
+                              store=store, etags=not args.no_etags) for i in range(args.replicas)]
+    for server in servers[1:]:
+        server.start()
+    try:
+        servers[0].serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
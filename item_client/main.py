@@ -2,16 +2,27 @@ import argparse
 import json
 import logging
 import os
+import random
+import sqlite3
 import sys
 
-from requests.exceptions import ConnectionError
+from requests.exceptions import ConnectionError, Timeout
 
 from PySide6 import QtCore
-from PySide6.QtWidgets import QApplication, QDialog, QFrame, QGridLayout, QLabel, QPushButton, QScrollArea, QVBoxLayout, QWidget
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import (QAbstractItemView, QApplication, QCheckBox, QDialog, QFrame, QHBoxLayout, QHeaderView,
+                               QLabel, QLineEdit, QPushButton, QTableView, QVBoxLayout, QWidget)
 
+from item_client.cache import ResponseCache
 from item_client.client import ItemClient
 from item_client.config import setup_logging
+from item_client.diff import AccountDiff, diff_accounts
+from item_client.exceptions import CircuitOpenError, DeadlineExceeded, ServerError
+from item_client.models import AccountFilterModel, AccountTableModel
+from item_client.records import AccountRecord, to_records
+from item_client.snapshot import SnapshotStore, default_snapshot_path
 from item_client.views import AccountFormView
+from item_client.workers import RequestExecutor
 from item_client.constants import *
 
 LOGGER = logging.getLogger(__name__)
@@ -29,258 +40,392 @@ def generate_dialog(text: str, success=False):
     return dialog
 
 
-def validate_account(account_data: dict):
-    """
-    Ensures all proper fields exist and they're of the correct type
-    """
-    for field in ACCOUNT_FIELDS:
-        # Check field is present
-        if field not in account_data:
-            LOGGER.error(f"Field {field} not in account")
-            return False
-
-        # Check for type
-        if field == FIELD_ORGNO:
-            if not isinstance(account_data.get(field), int):
-                LOGGER.error(f"Field {field} is not an int")
-                return False
-        elif not isinstance(account_data.get(field), str):
-            LOGGER.error(f"Field {field} is not a str")
-            return False
-    return True
-
-
-class Account:
-    """
-    Class holding both account data and account related widgets
-    """
-    def __init__(self, account_data: dict, client: ItemClient):
-        self.account_data = account_data
-        self.btn_name = QPushButton(self.account_data.get(FIELD_NAME))
-        self.btn_orgno = QPushButton(str(self.account_data.get(FIELD_ORGNO)))
-        self.client = client
-        self.btn_name.clicked.connect(lambda : self.handle_edit(self.account_data))
-        self.btn_orgno.clicked.connect(lambda : self.handle_edit(self.account_data))
-
-    @property
-    def name(self):
-        return self.account_data.get(FIELD_NAME)
-
-    @property
-    def orgno(self):
-        return self.account_data.get(FIELD_ORGNO)
-
-    def get_view_name(self):
-        return self.btn_name
-
-    def get_view_orgno(self):
-        return self.btn_orgno
-
-    def update_account(self, account_data):
-        LOGGER.debug(f"Updating account: {self.orgno}")
-        self.account_data.update(account_data)
-        self.btn_name.setText(self.name)
-
-    def handle_edit(self, account):
-        form = AccountFormView("EDIT ACCOUNT", account)
-        res = form.exec()
-        if res[0]:
-            account = res[1]
-            if validate_account(account):
-                try:
-                    LOGGER.info(f"Editing account: {account.get(FIELD_ORGNO)}")
-                    resp = self.client.edit_account(account)
-    
-                    LOGGER.debug(f"Response: {resp}")
-                    if resp.result:
-                        account_data = self.client.get_account(self.orgno).data
-                        self.update_account(account_data)
-                        dialog = generate_dialog(resp.message, True)
-                        dialog.exec()
-                    else:
-                        dialog = generate_dialog(resp.message)
-                        dialog.exec()
-                    return
-                except ConnectionError as e:
-                    dialog = generate_dialog(f"Could not connect to server {self.client.host}")
-                    dialog.exec()
-                except Exception as e:
-                    dialog = generate_dialog(f"Unknown error")
-                    LOGGER.error(f"Unknown error: {e}")
-                    dialog.exec()
-            else:
-                dialog = generate_dialog(f"Invalid account information, please check fields and try again")
-                dialog.exec()
-        else:
-            LOGGER.info(f"Cancel edit: {account.get(FIELD_ORGNO)}")
-
-
 class MainView(QWidget):
     MIN_WIDTH = 360
     MIN_HEIGHT = 640
-    COL_LEFT = 0
-    COL_RIGHT = 1
-
-    def __init__(self, host, port):
+    REQUEST_REFRESH = "refresh"
+    # Loading the first accounts runs under its own key, so edits cancelling a refresh don't stop it
+    REQUEST_POPULATE = "populate"
+    REQUEST_EDIT = "edit"
+    REQUEST_ADD = "add"
+    REQUEST_SNAPSHOT = "snapshot"
+    # Short lived, expired responses are revalidated with the server instead of downloaded again when possible
+    CACHE_TTL = 1
+    # Accounts are polled in the background, every poll without changes doubles the interval up to the maximum and
+    # any change or local edit resets it. Intervals are in milliseconds
+    POLL_MIN_INTERVAL = 2000
+    POLL_MAX_INTERVAL = 60000
+    POLL_BACKOFF = 2
+    POLL_JITTER = 0.1
+    # Milliseconds to wait for background requests and snapshot writes when closing
+    SHUTDOWN_TIMEOUT = 5000
+
+    def __init__(self, host, port, snapshot_path=None, poll=True):
+        """
+        :param host: ip address of the server, or a list of them for several replicas
+        :param port: port of the server, or a list of them matching host
+        :param str snapshot_path: Where to keep the last known accounts, defaults to a file per server in the home
+        directory. An empty string disables the snapshot
+        :param bool poll: Keep accounts up to date in the background, otherwise only UPDATE refreshes them
+        """
         super().__init__()
-        self.client = ItemClient(host, port)
-        self.accounts = {}
-
-        # Set layout properties
-        self.grid_row = 0
+        # Accounts are kept for as long as the application runs, as compact records
+        self.client = ItemClient(host, port, cache=ResponseCache(ttl=self.CACHE_TTL),
+                                 account_factory=AccountRecord.from_dict)
+        self._last_response = None
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setSingleShot(True)
+        self.poll_timer.timeout.connect(self.poll_accounts)
+        self._poll = poll
+        self._poll_interval = self.POLL_MIN_INTERVAL
+        self.model = AccountTableModel(self)
+        self.filter_model = AccountFilterModel(self.model, self)
+        self.executor = RequestExecutor(self)
+        # Snapshot writes run one at a time so they're applied in order
+        self.snapshot_executor = RequestExecutor(self, max_threads=1)
+        self.snapshot = self._open_snapshot(self.client.host, self.client.port, snapshot_path)
+        self._snapshot_age = None
+
+        # Set window properties
+        self.setWindowTitle("ITEM ACCOUNT MANAGEMENT")
         self.setMinimumWidth(self.MIN_WIDTH)
         self.setMinimumHeight(self.MIN_HEIGHT)
 
-        # Create the Grid layout
+        # Create the layout
         self._generate_layout()
 
-        # Set up scrolling
-        self._scroll_area = QScrollArea()
-        self._scroll_area.setWindowTitle("ITEM ACCOUNT MANAGEMENT")
-        self._scroll_area.setWidget(self)
-        self._scroll_area.setMinimumWidth(self.MIN_WIDTH + self._scroll_area.horizontalScrollBar().size().height())
-        self._scroll_area.setMinimumHeight(self.MIN_HEIGHT + self._scroll_area.verticalScrollBar().size().width())
-        self._scroll_area.setVisible(True)
-
         # Populate accounts
         self._populate_accounts()
 
     def _generate_layout(self):
-        self.layout = QGridLayout()
-        self.layout.setAlignment(QtCore.Qt.AlignTop)
+        self.layout = QVBoxLayout()
 
         # Add an ADD button
-        row = self.row
         btn_add = QPushButton("ADD")
         btn_add.clicked.connect(self.handle_add)
-        self.layout.addWidget(btn_add, row, self.COL_LEFT, 1, 2)
+        self.layout.addWidget(btn_add)
 
         # Add an UPDATE button
-        row = self.row
-        btn_upd = QPushButton("UPDATE")
-        btn_upd.clicked.connect(self.update_accounts)
-        self.layout.addWidget(btn_upd, row, self.COL_LEFT, 1 , 2)
+        self.btn_upd = QPushButton("UPDATE")
+        self.btn_upd.clicked.connect(self.update_accounts)
+        self.layout.addWidget(self.btn_upd)
+
+        # Add a status label, shows when requests are in flight
+        self.lbl_status = QLabel()
+        self.executor.busy_changed.connect(self._handle_busy_changed)
+        self.executor.key_busy_changed.connect(self._handle_key_busy_changed)
+        self.layout.addWidget(self.lbl_status)
 
         # Add a DIVIDER
-        row = self.row
         divider = QFrame()
         divider.setFrameShape(QFrame.HLine)
         divider.setFrameShadow(QFrame.Sunken)
-        self.layout.addWidget(divider, row, self.COL_LEFT, 1, 2)
-
-        # Add title
-        row = self.row
-        self.layout.addWidget(QLabel(FIELD_NAME.upper()), row, self.COL_LEFT)
-        self.layout.addWidget(QLabel(FIELD_ORGNO.upper()), row, self.COL_RIGHT)
+        self.layout.addWidget(divider)
+
+        # Add a SEARCH box
+        search_layout = QHBoxLayout()
+        self.txt_search = QLineEdit()
+        self.txt_search.setPlaceholderText("SEARCH")
+        self.txt_search.setClearButtonEnabled(True)
+        self.txt_search.textChanged.connect(self.handle_search)
+        self.chk_prefix = QCheckBox("WORD START")
+        self.chk_prefix.toggled.connect(lambda _: self.handle_search(self.txt_search.text()))
+        search_layout.addWidget(self.txt_search)
+        search_layout.addWidget(self.chk_prefix)
+        self.layout.addLayout(search_layout)
+
+        # Add the account list, only visible rows are rendered
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().hide()
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.clicked.connect(self.handle_edit)
+        self.layout.addWidget(self.table)
 
         # Set layout
         self.setLayout(self.layout)
         return self.layout
 
-    def _populate_accounts(self):
+    def _open_snapshot(self, host, port, snapshot_path):
+        if snapshot_path == "":
+            return None
         try:
-            res = self.client.get_accounts()
-            accounts_data = res.data if res.result else []
-            self.add_accounts(accounts_data)
-        except ConnectionError as e:
-	        dialog = generate_dialog(f"Could not connect to server {self.client.host}")
-	        dialog.exec()
-        except Exception as e:
-            dialog = generate_dialog(f"Unknown error")
-            LOGGER.error(f"Unknown error: {e}")
-            dialog.exec()
+            return SnapshotStore(snapshot_path or default_snapshot_path(host, port))
+        except (OSError, sqlite3.Error) as e:
+            LOGGER.warning(f"Could not open snapshot, accounts will not be saved: {e}")
+            return None
+
+    def _populate_accounts(self):
+        """
+        Show the saved snapshot right away and reconcile it with the server in the background. Only the first page of
+        the snapshot is loaded before showing, the rest follows in the background.
+        Without a snapshot, accounts are loaded from the server page by page and each page is shown as it arrives
+        """
+        pages = None
+        first_page = []
+        if self.snapshot is not None:
+            try:
+                self._snapshot_age = self.snapshot.age
+                pages = self.snapshot.iter_account_pages()
+                first_page = next(pages, [])
+            except sqlite3.Error as e:
+                LOGGER.warning(f"Could not load snapshot: {e}")
+
+        if first_page:
+            self.model.add_accounts(first_page)
+            self.executor.submit(self.REQUEST_POPULATE, lambda: pages, on_progress=self.model.add_accounts,
+                                 on_result=self._handle_snapshot_loaded, on_error=self._handle_snapshot_error,
+                                 coalesce=True)
+        else:
+            self._snapshot_age = None
+            self.executor.submit(self.REQUEST_POPULATE, self.client.iter_account_pages, on_progress=self.add_accounts,
+                                 on_result=self._handle_populated, on_error=self._handle_update_error, coalesce=True)
+
+    def _handle_snapshot_loaded(self, _):
+        LOGGER.info(f"Loaded {len(self.model)} accounts from snapshot")
+        self.update_accounts()
 
-    @property
-    def row(self):
-        row = self.grid_row
-        self.grid_row += 1
-        return row
+    def _handle_snapshot_error(self, error):
+        LOGGER.warning(f"Could not load snapshot: {error}")
+        self.update_accounts()
 
-    def add_account(self, account_data: dict):
+    def _handle_populated(self, _):
+        self._schedule_poll(changed=True)
+        if self.snapshot is not None:
+            accounts = list(self.model.accounts_by_orgno.values())
+            self.snapshot_executor.submit(self.REQUEST_SNAPSHOT, self.snapshot.save, accounts)
+
+    def _save_diff(self, diff, synced=False):
         """
-        Add a user
-        :param dict account: Account as 
+        :param bool synced: diff is of a full refresh, see SnapshotStore.apply_diff
         """
-        if not validate_account(account_data):
-            LOGGER.error(f"Invalid account {account_data}")
-            return False
+        if self.snapshot is not None and (diff or synced):
+            self.snapshot_executor.submit(self.REQUEST_SNAPSHOT, self.snapshot.apply_diff, diff, synced)
+
+    def _handle_request_error(self, error):
+        if isinstance(error, (CircuitOpenError, ServerError)):
+            dialog = generate_dialog(str(error))
+        elif isinstance(error, ConnectionError):
+            dialog = generate_dialog(f"Could not connect to server {self.client.host}")
+        elif isinstance(error, (DeadlineExceeded, Timeout)):
+            dialog = generate_dialog(f"Server {self.client.host} did not answer in time")
+        else:
+            dialog = generate_dialog(f"Unknown error")
+            LOGGER.error(f"Unknown error: {error}")
+        dialog.exec()
 
-        # Create account and store
-        account = Account(account_data, self.client)
-        LOGGER.debug(f"Adding account: {account.orgno}")
-        self.accounts[account.orgno] = account
+    def _handle_busy_changed(self, busy):
+        if busy and self._snapshot_age is not None:
+            self.lbl_status.setText(f"Loading... showing accounts saved {self._snapshot_age / 60:.0f} min ago")
+        else:
+            self.lbl_status.setText("Loading..." if busy else "")
 
-        # Set account views
-        row = self.row
-        self.layout.addWidget(account.get_view_name(), row, self.COL_LEFT)
-        self.layout.addWidget(account.get_view_orgno(), row, self.COL_RIGHT)
+    def _handle_key_busy_changed(self, key, busy):
+        if key in (self.REQUEST_REFRESH, self.REQUEST_POPULATE):
+            updating = self.executor.is_busy(self.REQUEST_REFRESH) or self.executor.is_busy(self.REQUEST_POPULATE)
+            self.btn_upd.setText("UPDATING..." if updating else "UPDATE")
+
+    def shutdown(self):
+        """
+        Stop background requests, finish saving the snapshot and close the client
+        """
+        self._poll = False
+        self.poll_timer.stop()
+        # Closing the client first makes requests in flight fail right away instead of running until they time out
+        self.client.close()
+        if not self.executor.shutdown(self.SHUTDOWN_TIMEOUT):
+            LOGGER.warning("Background requests did not stop in time")
+        if not self.snapshot_executor.wait(self.SHUTDOWN_TIMEOUT):
+            LOGGER.warning("Snapshot was not saved in time")
+
+    def add_account(self, account_data):
+        """
+        Add a user
+        :param account_data: AccountRecord or account dict
+        """
+        return self.add_accounts([account_data])
 
     def add_accounts(self, accounts_data):
-        for account_data in accounts_data:
-            self.add_account(account_data)
+        """
+        Add AccountRecords, dicts are converted and dropped if invalid
+        """
+        records = to_records(accounts_data)
+        LOGGER.debug("Adding %d accounts", len(records))
+        self.model.add_accounts(records)
+        return len(records) > 0
 
     def update_accounts(self):
-        try:
-            LOGGER.info("Updating accounts")
-            res = self.client.get_accounts()
-            accounts_data = res.data if res.result else []
-            for account_data in accounts_data:
-                if validate_account(account_data):
-                    orgno = account_data.get(FIELD_ORGNO)
-                    if orgno in self.accounts:
-                        self.accounts[orgno].update_account(account_data)
-                    else:
-                        self.add_account(account_data)
-                else:
-                    LOGGER.warning(f"Could not update account {account_data}")
-            LOGGER.info("Updated")
-        except ConnectionError as e:
-            dialog = generate_dialog(f"Could not connect to server {self.client.host}")
+        """
+        Refresh accounts in the background, clicks while a refresh is running are merged into one more refresh
+        """
+        LOGGER.info("Updating accounts")
+        self.executor.submit(self.REQUEST_REFRESH, self.client.get_accounts, on_result=self._handle_updated,
+                             on_error=self._handle_update_error, coalesce=True)
+
+    def poll_accounts(self):
+        """
+        Check for changes in the background. The accounts response is cached with its ETag, so while nothing changed
+        the server only answers "not modified" and no accounts are downloaded or compared. Polling is turned off for
+        servers that don't send ETags, as every poll would download all accounts
+        """
+        if self.executor.is_busy(self.REQUEST_REFRESH):
+            # A refresh is already running and schedules the next poll when done
+            return
+        LOGGER.debug("Polling accounts, interval %d ms", self._poll_interval)
+        self.executor.submit(self.REQUEST_REFRESH, self.client.get_accounts, on_result=self._handle_updated,
+                             on_error=self._handle_poll_error, coalesce=True)
+
+    def _schedule_poll(self, changed=False):
+        """
+        Start the poll timer, sooner if accounts just changed and later the longer they stay the same
+        """
+        if not self._poll:
+            return
+        if changed:
+            self._poll_interval = self.POLL_MIN_INTERVAL
+        else:
+            self._poll_interval = min(self._poll_interval * self.POLL_BACKOFF, self.POLL_MAX_INTERVAL)
+        # Spread out polls of clients started at the same time
+        jitter = random.uniform(1 - self.POLL_JITTER, 1 + self.POLL_JITTER)
+        self.poll_timer.start(int(self._poll_interval * jitter))
+
+    def _handle_updated(self, res):
+        changed = self._apply_accounts(res)
+        if self._poll and self.client.etags_supported is False:
+            LOGGER.warning("Server does not send ETags, polling would download all accounts every time. Polling is off, "
+                           "click UPDATE to refresh")
+            self._poll = False
+            self.poll_timer.stop()
+        self._schedule_poll(changed)
+
+    def _handle_update_error(self, error):
+        self._schedule_poll()
+        self._handle_request_error(error)
+
+    def _handle_poll_error(self, error):
+        # Background polls back off quietly, UPDATE still reports errors
+        LOGGER.warning(f"Could not poll accounts: {error}")
+        self._schedule_poll()
+
+    def _apply_accounts(self, res):
+        """
+        :return: True if any account changed
+        """
+        if not res.result:
+            LOGGER.warning(f"Could not update accounts: {res.message}")
+            return False
+        if res is self._last_response:
+            # Cached or revalidated response, nothing changed since it was applied
+            LOGGER.debug("Updated: no changes")
+            return False
+        self._last_response = res
+        diff = diff_accounts(self.model.accounts_by_orgno, to_records(res.data))
+        self.model.apply_diff(diff)
+        self._save_diff(diff, synced=True)
+        self._snapshot_age = None
+        LOGGER.info("Updated: %s", diff)
+        return bool(diff)
+
+    def _edit_account(self, base, changes):
+        """
+        Runs in the background, sends only the changed fields and only if the account is still base on the server
+        :return: (response, stored account), the stored account is the current one on the server after a conflict
+        """
+        resp = self.client.edit_account({FIELD_ORGNO: base.orgno, **changes}, base=base)
+        LOGGER.debug("Response: %s", resp)
+        account_data = resp.data if isinstance(resp.data, AccountRecord) else None
+        if resp.result and account_data is None:
+            # Servers that don't return the edited account, fetch it and fall back to what was sent
+            account_data = self.client.get_account(base.orgno).data or base.replace(**changes)
+        return resp, account_data
+
+    def _handle_edited(self, result):
+        resp, account_data = result
+        if resp.result or (resp.conflict and account_data is not None):
+            # A refresh started before the edit would overwrite it with old data
+            self.executor.cancel(self.REQUEST_REFRESH)
+            self.model.update_account(account_data)
+            self._save_diff(AccountDiff(changed=[account_data]))
+            # Others are likely editing too, look for their changes sooner
+            self._schedule_poll(changed=True)
+        if resp.conflict:
+            LOGGER.warning(f"Edit conflict: {resp.message}")
+            dialog = generate_dialog(f"{resp.message}, your changes were not saved. The table now shows the "
+                                     f"current account, edit it again to apply your changes.")
+        else:
+            dialog = generate_dialog(resp.message, resp.result)
+        dialog.exec()
+
+    def handle_search(self, query):
+        """
+        Show only accounts matching query in any of their fields, all accounts if query is empty
+        """
+        if not query.strip():
+            self.table.setModel(self.model)
+            return
+        self.filter_model.set_query(query, self.chk_prefix.isChecked())
+        if self.table.model() is not self.filter_model:
+            self.table.setModel(self.filter_model)
+
+    def handle_edit(self, index):
+        account = self.table.model().account(index.row())
+        if account is None:
+            return
+        orgno = account.orgno
+        form = AccountFormView("EDIT ACCOUNT", account)
+        res = form.exec()
+        if not res[0]:
+            LOGGER.info(f"Cancel edit: {orgno}")
+            return
+        changes = account.changes(res[1])
+        if FIELD_ORGNO in changes:
+            dialog = generate_dialog("Orgno of an existing account can not be changed")
             dialog.exec()
-        except Exception as e:
-            dialog = generate_dialog(f"Unknown error")
-            LOGGER.error(f"Unknown error: {e}")
+        elif not changes:
+            LOGGER.info(f"No changes to account {orgno}, not editing")
+        else:
+            LOGGER.info(f"Editing account {orgno}: {', '.join(changes)}")
+            self.executor.submit((self.REQUEST_EDIT, orgno), self._edit_account, account, changes,
+                                 on_result=self._handle_edited, on_error=self._handle_request_error)
+
+    def _handle_added(self, resp):
+        LOGGER.debug("Response: %s", resp)
+        if not resp.result:
+            dialog = generate_dialog(resp.message)
             dialog.exec()
+        self.update_accounts()
 
     def handle_add(self):
-        try:
-            form = AccountFormView("ADD ACCOUNT")
-            res = form.exec()
-            LOGGER.info(f"res[0]: {res[0]}")
-            if res[0]:
-                account = res[1]
-                if validate_account(res[1]):
-                    LOGGER.info(f"Adding account: {account.get(FIELD_ORGNO)}")
-                    self.client.add_account(account)
-                    self.update_accounts()
-                    return
-                else:
-                    dialog = generate_dialog(f"Invalid account information, please check fields and try again")
-                    dialog.exec()
-                    return
+        form = AccountFormView("ADD ACCOUNT")
+        res = form.exec()
+        LOGGER.info(f"res[0]: {res[0]}")
+        if res[0]:
+            account = res[1]
+            LOGGER.info(f"Adding account: {account.orgno}")
+            self.executor.submit((self.REQUEST_ADD, account.orgno), self.client.add_account, account,
+                                 on_result=self._handle_added, on_error=self._handle_request_error)
+        else:
+            if "error" in res[1]:
+                LOGGER.error(res[1].get("error"))
+                dialog = generate_dialog(res[1].get("error"))
+                dialog.exec()
             else:
-                if "error" in res[1]:
-                    LOGGER.error(res[1].get("error"))
-                    dialog = generate_dialog(res[1].get("error"))
-                    dialog.exec()
-                else:
-                    LOGGER.info("Cancel adding of account")
-                return
-        except ConnectionError as e:
-            dialog = generate_dialog(f"Could not connect to server {self.client.host}")
-            dialog.exec()
-        except Exception as e:
-            dialog = generate_dialog(f"Unknown error")
-            LOGGER.error(f"Unknown error: {e}")
-            dialog.exec()
+                LOGGER.info("Cancel adding of account")
 
 
 def main():
     parser = argparse.ArgumentParser(description="Item's Client")
     parser.add_argument("-v", "--verbose", action="store_true", help="increase log output verbosity")
-    parser.add_argument('--ip', '-i', type=str, default="127.0.0.1", help="The Rest API server's ip address")
-    parser.add_argument('--port', '-p', type=int, default=8080, help="The Rest API server's port")
+    parser.add_argument('--ip', '-i', type=lambda value: value.split(","), default="127.0.0.1", help="The Rest API server's ip address, or comma separated ip addresses of several replicas")
+    parser.add_argument('--port', '-p', type=lambda value: [int(port) for port in value.split(",")], default="8080", help="The Rest API server's port, or comma separated ports matching --ip")
     parser.add_argument('--log-file', '-l', type=str, help="Output logs to specified file")
+    parser.add_argument('--log-json', action="store_true", help="Output logs as one json object per line")
+    parser.add_argument('--snapshot', '-s', type=str, help="File to keep the last known accounts in, shown at startup before the server answers")
+    parser.add_argument('--no-snapshot', action="store_true", help="Do not load or save the last known accounts")
+    parser.add_argument('--no-poll', action="store_true", help="Only update accounts when UPDATE is clicked")
     args = parser.parse_args()
 
     # Sanitize arguments
@@ -292,15 +437,16 @@ def main():
         # Check if path is valid
         dir_path = os.path.dirname(os.path.abspath(args.log_file))
         if dir_path:
-            setup_logging(args.log_file, log_level)
+            setup_logging(args.log_file, log_level, json_format=args.log_json)
     else:
-        setup_logging(level=log_level)
+        setup_logging(level=log_level, json_format=args.log_json)
 
-    setup_logging(level=logging.DEBUG)
     app = QApplication(sys.argv)
     try:
-        main_view = MainView(args.ip, args.port)
+        main_view = MainView(args.ip, args.port, snapshot_path="" if args.no_snapshot else args.snapshot,
+                             poll=not args.no_poll)
         main_view.show()
+        app.aboutToQuit.connect(main_view.shutdown)
     except Exception as e:
         LOGGER.error(f"Could not launch app: {e}")
         dialog = generate_dialog("Could not launch app")
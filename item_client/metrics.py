@@ -0,0 +1,217 @@
+import json
+import socket
+import threading
+import time
+import weakref
+
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+
+# Upper bounds of histogram buckets
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+SIZE_BUCKETS = [128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216]
+
+_connect_timing = threading.local()
+
+
+class TimedHTTPConnection(HTTPConnection):
+    """
+    Connection recording how long it took to connect, for the request currently running on this thread
+    """
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _connect_timing.seconds = time.perf_counter() - start
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    """
+    Pool of TimedHTTPConnections, keeps track of them so requests in flight can be aborted
+    """
+    ConnectionCls = TimedHTTPConnection
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._connections = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        with self._connections_lock:
+            self._connections.add(conn)
+        return conn
+
+    def abort(self):
+        """
+        Shut down the sockets of all connections, requests waiting for a response on them fail right away
+        """
+        with self._connections_lock:
+            connections = list(self._connections)
+        for conn in connections:
+            sock = getattr(conn, "sock", None)
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def reset_connect_time():
+    _connect_timing.seconds = 0.0
+
+
+def connect_time():
+    """
+    Seconds spent connecting during the current request on this thread, 0 if a pooled connection was reused
+    """
+    return getattr(_connect_timing, "seconds", 0.0)
+
+
+class RequestInfo:
+    """
+    What happened during a single request, passed to every request hook.
+
+    Times are in seconds. ttfb is the time until the response headers arrived, which includes connecting and the time
+    the server took. total is the time until the whole body was received and decode the time spent parsing it.
+    Hosts are always ip addresses, so there is no time spent on DNS. server is the url prefix of the replica that was
+    sent the request.
+    """
+    __slots__ = ("method", "endpoint", "server", "status", "error", "bytes_sent", "bytes_received", "connect", "ttfb",
+                 "total", "decode")
+
+    def __init__(self, method, endpoint, server=None):
+        self.method = method
+        self.endpoint = endpoint
+        self.server = server
+        self.status = None
+        self.error = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.connect = 0.0
+        self.ttfb = 0.0
+        self.total = 0.0
+        self.decode = 0.0
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def to_dict(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + ["+Inf"], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"count": self.count, "sum": self.sum, "max": self.max, "buckets": buckets}
+
+
+class MetricsRegistry:
+    """
+    Named counters and histograms with labels, which can be dumped as json or in the Prometheus text format
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name, labels, factory):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = self._metrics[key] = (kind, factory())
+        return metric[1]
+
+    def counter(self, name, **labels):
+        return self._get("counter", name, labels, Counter)
+
+    def histogram(self, name, buckets=LATENCY_BUCKETS, **labels):
+        return self._get("histogram", name, labels, lambda: Histogram(buckets))
+
+    def to_dict(self):
+        result = {}
+        for (name, labels), (kind, metric) in sorted(self._metrics.items(), key=lambda item: item[0]):
+            value = metric.value if kind == "counter" else metric.to_dict()
+            result.setdefault(name, []).append({"labels": dict(labels), "value": value})
+        return result
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self):
+        lines = []
+        typed = set()
+        for (name, labels), (kind, metric) in sorted(self._metrics.items(), key=lambda item: item[0]):
+            if name not in typed:
+                lines.append(f"# TYPE {name} {kind}")
+                typed.add(name)
+            if kind == "counter":
+                lines.append(f"{name}{_labels(labels)} {metric.value}")
+                continue
+            for bound, count in metric.to_dict()["buckets"].items():
+                lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {metric.sum}")
+            lines.append(f"{name}_count{_labels(labels)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class MetricsHook:
+    """
+    Request hook recording every request in a MetricsRegistry
+    """
+    def __init__(self, registry=None):
+        self.registry = registry if registry is not None else MetricsRegistry()
+
+    def __call__(self, info: RequestInfo):
+        registry = self.registry
+        endpoint = info.endpoint
+        registry.counter("item_client_requests_total", endpoint=endpoint, server=info.server or "",
+                         status=info.status or 0).inc()
+        if info.error is not None:
+            registry.counter("item_client_request_errors_total", endpoint=endpoint, error=info.error).inc()
+        registry.histogram("item_client_request_seconds", endpoint=endpoint).observe(info.total)
+        registry.histogram("item_client_request_connect_seconds", endpoint=endpoint).observe(info.connect)
+        registry.histogram("item_client_request_ttfb_seconds", endpoint=endpoint).observe(info.ttfb)
+        registry.histogram("item_client_request_decode_seconds", endpoint=endpoint).observe(info.decode)
+        registry.histogram("item_client_request_sent_bytes", SIZE_BUCKETS, endpoint=endpoint).observe(info.bytes_sent)
+        registry.histogram("item_client_request_received_bytes", SIZE_BUCKETS,
+                           endpoint=endpoint).observe(info.bytes_received)
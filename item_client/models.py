@@ -0,0 +1,306 @@
+import logging
+
+from bisect import bisect_left
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer
+
+from item_client.constants import *
+from item_client.diff import AccountDiff
+from item_client.search import SearchIndex
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _sort_key(account):
+    return (account.name, account.orgno)
+
+
+class AccountTableModel(QAbstractTableModel):
+    """
+    Table model over all accounts, one row per account sorted by name.
+
+    Accounts are stored once in a flat list with a parallel list of sort keys, rows are found by bisecting the keys
+    so adding, removing and updating a few accounts does not touch the rest. Views only ask for the rows they show so
+    no per account widgets are created.
+    """
+    COLUMNS = [FIELD_NAME, FIELD_ORGNO]
+    # Batches changing more rows than this fraction of the model reset the model instead of moving rows one at a time
+    RESET_FRACTION = 0.1
+    RESET_MIN_ROWS = 100
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._accounts = []
+        self._keys = []
+        self._by_orgno = {}
+        self.search_index = SearchIndex()
+
+    def __len__(self):
+        return len(self._accounts)
+
+    def __contains__(self, orgno):
+        return orgno in self._by_orgno
+
+    @property
+    def accounts_by_orgno(self):
+        return self._by_orgno
+
+    def orgnos(self):
+        """
+        Orgnos of all accounts in row order
+        """
+        return [account.orgno for account in self._accounts]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._accounts)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        value = getattr(self._accounts[index.row()], self.COLUMNS[index.column()])
+        return value if isinstance(value, str) else str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section].upper()
+        return None
+
+    def account(self, row):
+        return self._accounts[row]
+
+    def get_account(self, orgno):
+        return self._by_orgno.get(orgno)
+
+    def row(self, orgno):
+        account = self._by_orgno.get(orgno)
+        return None if account is None else bisect_left(self._keys, _sort_key(account))
+
+    def _should_reset(self, count):
+        return count > max(self.RESET_MIN_ROWS, len(self._accounts) * self.RESET_FRACTION)
+
+    def _reset(self, accounts):
+        self.beginResetModel()
+        self._accounts = sorted(accounts, key=_sort_key)
+        self._keys = [_sort_key(account) for account in self._accounts]
+        self._by_orgno = {account.orgno: account for account in self._accounts}
+        self.search_index.clear()
+        self.search_index.add_many(self._accounts)
+        self.endResetModel()
+
+    def _append(self, accounts):
+        """
+        Add accounts sorting after all existing ones as a single block of rows
+        :return: False if the accounts are not sorted or do not all sort after existing accounts
+        """
+        keys = [_sort_key(account) for account in accounts]
+        if (self._keys and keys[0] <= self._keys[-1]) or any(a >= b for a, b in zip(keys, keys[1:])):
+            return False
+        first = len(self._accounts)
+        self.beginInsertRows(QModelIndex(), first, first + len(accounts) - 1)
+        self._keys.extend(keys)
+        self._accounts.extend(accounts)
+        for account in accounts:
+            self._by_orgno[account.orgno] = account
+        self.search_index.add_many(accounts)
+        self.endInsertRows()
+        return True
+
+    def _insert(self, account):
+        key = _sort_key(account)
+        row = bisect_left(self._keys, key)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._keys.insert(row, key)
+        self._accounts.insert(row, account)
+        self._by_orgno[account.orgno] = account
+        self.search_index.add(account)
+        self.endInsertRows()
+
+    def _remove(self, orgno):
+        row = self.row(orgno)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._keys[row]
+        del self._accounts[row]
+        del self._by_orgno[orgno]
+        self.search_index.remove(orgno)
+        self.endRemoveRows()
+
+    def add_accounts(self, accounts):
+        """
+        Add AccountRecords in a single batch. Accounts already in the model are skipped, e.g. where pages fetched by
+        offset overlap because accounts were added on the server in the meantime
+        """
+        added = {}
+        for account in accounts:
+            if account.orgno not in self._by_orgno:
+                added.setdefault(account.orgno, account)
+        self.apply_diff(AccountDiff(added=list(added.values())))
+
+    def update_account(self, account_data):
+        """
+        Update an account, it's added if it's not in the model
+        """
+        self.update_accounts([account_data])
+
+    def update_accounts(self, accounts):
+        """
+        Update accounts, views are notified once for the whole batch. Accounts not in the model are added
+        """
+        self.apply_diff(AccountDiff(changed=list(accounts)))
+
+    def remove_accounts(self, orgnos):
+        self.apply_diff(AccountDiff(removed=list(orgnos)))
+
+    def apply_diff(self, diff: AccountDiff):
+        """
+        Apply added, removed and changed AccountRecords while keeping rows sorted.
+
+        Only changed rows are touched. Changes to a name move the row, other changes are updated in place and views
+        are notified once for all of them. Changed accounts that are not in the model are added.
+        """
+        if not diff:
+            return
+
+        # Pages of sorted accounts, e.g. while populating, are appended in one go
+        if diff.added and not diff.removed and not diff.changed and self._append(diff.added):
+            return
+
+        added = list(diff.added)
+        in_place = []
+        moved = []
+        for account in diff.changed:
+            current = self._by_orgno.get(account.orgno)
+            if current is None:
+                # Removed in the meantime, e.g. an edit that completes after a refresh removed the account
+                added.append(account)
+            elif account.name == current.name:
+                in_place.append(account)
+            else:
+                moved.append(account)
+        LOGGER.debug("Updating %d accounts, %d moved", len(diff.changed), len(moved))
+
+        if self._should_reset(len(added) + len(diff.removed) + len(moved)):
+            accounts = dict(self._by_orgno)
+            for orgno in diff.removed:
+                accounts.pop(orgno, None)
+            for account in added + moved + in_place:
+                accounts[account.orgno] = account
+            self._reset(accounts.values())
+            return
+
+        for orgno in diff.removed:
+            self._remove(orgno)
+        for account in moved:
+            self._remove(account.orgno)
+            self._insert(account)
+        for account in added:
+            self._insert(account)
+
+        first = last = None
+        for account in in_place:
+            orgno = account.orgno
+            row = self.row(orgno)
+            self._accounts[row] = account
+            self._by_orgno[orgno] = account
+            self.search_index.add(account)
+            first = row if first is None else min(first, row)
+            last = row if last is None else max(last, row)
+        if first is not None:
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(self.COLUMNS) - 1), [Qt.DisplayRole])
+
+
+class AccountFilterModel(QAbstractTableModel):
+    """
+    Accounts of an AccountTableModel matching a search query, in the same order.
+
+    Typing more characters only searches the accounts that matched before. Changes to the source model are picked up
+    once per event loop iteration no matter how many changes were made.
+    """
+    COLUMNS = AccountTableModel.COLUMNS
+
+    def __init__(self, source: AccountTableModel, parent=None):
+        super().__init__(parent)
+        self._source = source
+        self._orgnos = []
+        self._query = ""
+        self._prefix = False
+        self._narrowable = False
+        self._refilter_scheduled = False
+        # Removed accounts are dropped right away, views must never see rows without an account
+        source.modelReset.connect(self._drop_removed)
+        source.rowsRemoved.connect(self._drop_removed)
+        source.modelReset.connect(self._handle_source_changed)
+        source.rowsInserted.connect(self._handle_source_changed)
+        source.rowsRemoved.connect(self._handle_source_changed)
+        source.dataChanged.connect(self._handle_source_changed)
+
+    @property
+    def query(self):
+        return self._query
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._orgnos)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        account = self.account(index.row())
+        if account is None:
+            return None
+        value = getattr(account, self.COLUMNS[index.column()])
+        return value if isinstance(value, str) else str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        return self._source.headerData(section, orientation, role)
+
+    def account(self, row):
+        return self._source.get_account(self._orgnos[row])
+
+    def set_query(self, query, prefix=False):
+        candidates = None
+        if self._narrowable and prefix == self._prefix and self._query.strip() and query.startswith(self._query):
+            # Every match of a longer query also matches the shorter one
+            candidates = self._orgnos
+        if candidates is None:
+            candidates = self._source.orgnos()
+        orgnos = self._source.search_index.filter(candidates, query, prefix)
+
+        self.beginResetModel()
+        self._orgnos = orgnos
+        self.endResetModel()
+        self._query = query
+        self._prefix = prefix
+        self._narrowable = True
+
+    def _drop_removed(self, *args):
+        """
+        Remove rows of accounts no longer in the source, as blocks of consecutive rows
+        """
+        row = len(self._orgnos) - 1
+        while row >= 0:
+            if self._orgnos[row] in self._source:
+                row -= 1
+                continue
+            last = row
+            while row > 0 and self._orgnos[row - 1] not in self._source:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row, last)
+            del self._orgnos[row:last + 1]
+            self.endRemoveRows()
+            row -= 1
+
+    def _handle_source_changed(self, *args):
+        self._narrowable = False
+        if not self._refilter_scheduled:
+            self._refilter_scheduled = True
+            QTimer.singleShot(0, self._refilter)
+
+    def _refilter(self):
+        self._refilter_scheduled = False
+        if self._query.strip():
+            self.set_query(self._query, self._prefix)
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import logging
+
+from item_client.constants import *
+from item_client.validation import Schema
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AccountRecord:
+    """
+    A validated account.
+
+    Fields are slots named after ACCOUNT_FIELDS, so a record costs a fraction of the dict it's decoded from and hot
+    loops can use attribute access. Records are validated once when created from a dict and treated as immutable,
+    use replace to change fields. get, [] and in work like on the dict for code that still expects one.
+    """
+    __slots__ = tuple(ACCOUNT_FIELDS)
+
+    def __init__(self, name, orgno, leader_title, leader_name, type):
+        self.name = name
+        self.orgno = orgno
+        self.leader_title = leader_title
+        self.leader_name = leader_name
+        self.type = type
+
+    @staticmethod
+    def from_dict(account_data):
+        """
+        Create a record from an account dict, extra fields are ignored. Invalid accounts are not logged, use
+        to_records or RECORD_SCHEMA.error to find out why
+        :return: AccountRecord or None if a field is missing or of the wrong type
+        """
+        return _convert(account_data)
+
+    def as_tuple(self):
+        """
+        Field values in ACCOUNT_FIELDS order
+        """
+        return (self.name, self.orgno, self.leader_title, self.leader_name, self.type)
+
+    def to_dict(self):
+        return dict(zip(ACCOUNT_FIELDS, self.as_tuple()))
+
+    def changes(self, other):
+        """
+        Fields of other that differ from this record
+        :return: dict of field to the value in other, empty if nothing changed
+        """
+        return {field: getattr(other, field) for field in ACCOUNT_FIELDS if getattr(self, field) != getattr(other, field)}
+
+    def replace(self, **fields):
+        """
+        Copy of the record with some fields changed, the new values are not validated
+        """
+        values = self.to_dict()
+        values.update(fields)
+        return AccountRecord(**values)
+
+    def get(self, field, default=None):
+        return getattr(self, field, default) if field in ACCOUNT_FIELD_TYPES else default
+
+    def __getitem__(self, field):
+        if field not in ACCOUNT_FIELD_TYPES:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __contains__(self, field):
+        return field in ACCOUNT_FIELD_TYPES
+
+    def __eq__(self, other):
+        if isinstance(other, AccountRecord):
+            return self.as_tuple() == other.as_tuple()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+def account_version(account):
+    """
+    Hash of the contents of an account, AccountRecord or dict, used as If-Match precondition of edits so an edit is
+    only applied to the account it was based on. Computed from the fields as a compact json list so servers can
+    compute the same
+    """
+    values = [account[field] for field in ACCOUNT_FIELDS]
+    data = json.dumps(values, ensure_ascii=False, separators=(",", ":"))
+    return '"{}"'.format(hashlib.sha1(data.encode()).hexdigest())
+
+
+# Titles and types are shared by many accounts, only one copy of each is kept
+RECORD_SCHEMA = Schema(ACCOUNT_FIELD_TYPES, factory=AccountRecord, intern_fields=(FIELD_LEADER_TITLE, FIELD_TYPE))
+_convert = RECORD_SCHEMA.convert
+
+
+def to_records(accounts):
+    """
+    Convert accounts to records in one pass, records are passed through and invalid accounts are dropped and logged
+    together
+    :return: list of AccountRecord
+    """
+    records, report = RECORD_SCHEMA.validate(accounts)
+    if report.invalid:
+        LOGGER.error(f"Dropped invalid accounts, {report}")
+    return records
@@ -0,0 +1,98 @@
+import logging
+import random
+import threading
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.1
+DEFAULT_MAX_BACKOFF = 5
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 5
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, the n-th retry waits a random time up to backoff * 2 ** n seconds
+    """
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def delay(self, retry):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** retry))
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a server after failure_threshold consecutive failures.
+
+    While open, requests fail immediately with CircuitOpenError. After reset_timeout seconds a single trial request
+    is let through, if it succeeds the breaker closes again, otherwise it stays open for another reset_timeout.
+    """
+    def __init__(self, host, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def retry_after(self):
+        """
+        Seconds until an open breaker lets a trial request through
+        """
+        return max(self._opened_at + self.reset_timeout - time.monotonic(), 0)
+
+    def ready(self):
+        """
+        Same as allow but returns False instead of raising
+        """
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return True
+            if self.state == STATE_OPEN and self.retry_after <= 0:
+                LOGGER.info(f"Trying server {self.host} again")
+                self.state = STATE_HALF_OPEN
+                return True
+            return False
+
+    def allow(self):
+        """
+        :raises CircuitOpenError: if requests should not be sent right now
+        """
+        if not self.ready():
+            # Imported here as it depends on requests, which the commandline only loads when needed
+            from item_client.exceptions import CircuitOpenError
+
+            raise CircuitOpenError(self.host, self.retry_after)
+
+    def record_success(self):
+        with self._lock:
+            if self.state != STATE_CLOSED:
+                LOGGER.info(f"Server {self.host} is available again")
+            self.state = STATE_CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == STATE_HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != STATE_OPEN:
+                    LOGGER.warning(f"Server {self.host} failed {self.failures} times, pausing requests")
+                    self.opened += 1
+                self.state = STATE_OPEN
+                self._opened_at = time.monotonic()
+
+    @property
+    def stats(self):
+        return {"state": self.state, "failures": self.failures, "opened": self.opened}
@@ -0,0 +1,62 @@
+import re
+from operator import attrgetter
+
+from item_client.constants import *
+
+SEARCH_FIELDS = [FIELD_NAME, FIELD_ORGNO, FIELD_LEADER_NAME, FIELD_LEADER_TITLE, FIELD_TYPE]
+
+_search_values = attrgetter(*SEARCH_FIELDS)
+
+
+def _text(account):
+    # Fields are separated by newlines so terms never match across two fields
+    return "\n" + "\n".join(map(str, _search_values(account))).lower()
+
+
+class SearchIndex:
+    """
+    Lowercased searchable text of every account keyed by orgno, kept up to date as accounts are added, changed and
+    removed so searching never has to touch the accounts themselves.
+
+    Queries are split on whitespace and an account matches if it matches every term. Terms match anywhere in a field,
+    or only at the start of a word if prefix is set.
+    """
+    def __init__(self):
+        self._text = {}
+
+    def __len__(self):
+        return len(self._text)
+
+    def add(self, account):
+        """
+        Add or update an account
+        """
+        self._text[account.orgno] = _text(account)
+
+    def add_many(self, accounts):
+        self._text.update((account.orgno, _text(account)) for account in accounts)
+
+    def remove(self, orgno):
+        self._text.pop(orgno, None)
+
+    def clear(self):
+        self._text.clear()
+
+    def filter(self, orgnos, query, prefix=False):
+        """
+        :param orgnos: Candidate orgnos, e.g. all accounts in display order or the result of a shorter query
+        :return: list of matching orgnos in the order of orgnos
+        """
+        terms = query.lower().split()
+        if not terms:
+            return list(orgnos)
+        text = self._text
+        # Filter one term at a time, later terms only look at what matched so far
+        matches = orgnos
+        for term in terms:
+            if prefix:
+                match = re.compile(r"(?<!\w)" + re.escape(term)).search
+                matches = [orgno for orgno in matches if match(text[orgno])]
+            else:
+                matches = [orgno for orgno in matches if term in text[orgno]]
+        return list(matches)
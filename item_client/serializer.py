@@ -0,0 +1,71 @@
+"""
+json encoding and decoding, using the fastest json library installed.
+
+orjson is preferred, then ujson, falling back to the standard library. BACKEND names the library in use. Objects with
+a to_dict method, e.g. account records, are encoded as the dict it returns.
+"""
+import json
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _default(obj):
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return to_dict()
+
+
+try:
+    import orjson
+
+    BACKEND = "orjson"
+
+    def loads(data):
+        return orjson.loads(data)
+
+    def dumps(obj):
+        return orjson.dumps(obj, default=_default)
+except ImportError:
+    try:
+        import ujson
+
+        BACKEND = "ujson"
+
+        def loads(data):
+            return ujson.loads(data)
+
+        def dumps(obj):
+            return ujson.dumps(obj, ensure_ascii=False, default=_default).encode()
+    except ImportError:
+        BACKEND = "json"
+        _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default)
+
+        def loads(data):
+            return json.loads(data)
+
+        def dumps(obj):
+            return _encoder.encode(obj).encode()
+
+
+def decode_response(data, account_factory=None):
+    """
+    Decode a response body
+    :param account_factory: If given, called with every account dict in "data" to convert it, e.g. to a compact record
+    type. Accounts for which it returns None are dropped and counted in a single log message
+    :return: dict of the decoded envelope
+    """
+    envelope = loads(data)
+    if account_factory is not None and isinstance(envelope, dict):
+        accounts = envelope.get("data")
+        if isinstance(accounts, list):
+            records = [record for record in map(account_factory, accounts) if record is not None]
+            if len(records) < len(accounts):
+                LOGGER.error(f"Dropped {len(accounts) - len(records)} of {len(accounts)} invalid accounts")
+            envelope["data"] = records
+        elif isinstance(accounts, dict) and accounts:
+            envelope["data"] = account_factory(accounts)
+            if envelope["data"] is None:
+                LOGGER.error(f"Dropped invalid account: {accounts}")
+    return envelope
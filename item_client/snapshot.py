@@ -0,0 +1,161 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from item_client.constants import *
+from item_client.records import AccountRecord
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.expanduser("~"), ".item_client")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    orgno INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    leader_title TEXT NOT NULL,
+    leader_name TEXT NOT NULL,
+    type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS accounts_name ON accounts (name, orgno);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+_COLUMNS = ", ".join(ACCOUNT_FIELDS)
+_SELECT = f"SELECT {_COLUMNS} FROM accounts"
+_UPSERT = f"INSERT OR REPLACE INTO accounts ({_COLUMNS}) VALUES ({', '.join('?' * len(ACCOUNT_FIELDS))})"
+
+META_SYNCED_AT = "synced_at"
+DEFAULT_PAGE_SIZE = 1000
+
+
+def default_snapshot_path(host, port):
+    return os.path.join(DEFAULT_SNAPSHOT_DIR, f"snapshot-{host}-{port}.sqlite3")
+
+
+def _row(account):
+    return account.as_tuple()
+
+
+def _account(row):
+    # Rows were validated before being stored and columns are in ACCOUNT_FIELDS order
+    return AccountRecord(*row)
+
+
+class SnapshotStore:
+    """
+    Last known set of accounts of a server, persisted in SQLite so it can be shown before the server answers or
+    browsed while offline.
+
+    Every call uses its own connection so the store can be used from any thread, writes are serialized.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        dir_path = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dir_path, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        # Connections are never used concurrently, but paged reads may continue on another thread
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def _query(self, sql, params=()):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def _write(self, fn, synced=True):
+        """
+        :param bool synced: The snapshot is now in sync with the server, its age starts over
+        """
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    fn(conn)
+                    if synced:
+                        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                     (META_SYNCED_AT, str(time.time())))
+            finally:
+                conn.close()
+
+    @property
+    def synced_at(self):
+        """
+        Time of the last sync in seconds since the epoch, None if never synced
+        """
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (META_SYNCED_AT,))
+        return float(rows[0][0]) if rows else None
+
+    @property
+    def age(self):
+        """
+        Seconds since the last sync, None if never synced
+        """
+        synced_at = self.synced_at
+        return None if synced_at is None else time.time() - synced_at
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM accounts")[0][0]
+
+    def get_account(self, orgno):
+        rows = self._query(f"{_SELECT} WHERE orgno = ?", (int(orgno),))
+        return _account(rows[0]) if rows else None
+
+    def get_accounts(self, n=0):
+        """
+        Accounts sorted by name, all of them or the first n
+        """
+        n = int(n)
+        if n:
+            rows = self._query(f"{_SELECT} ORDER BY name, orgno LIMIT ?", (n,))
+        else:
+            rows = self._query(f"{_SELECT} ORDER BY name, orgno")
+        return [_account(row) for row in rows]
+
+    def iter_account_pages(self, page_size=DEFAULT_PAGE_SIZE):
+        """
+        Accounts sorted by name, a page at a time
+        :return: generator of lists of accounts
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(f"{_SELECT} ORDER BY name, orgno LIMIT ?", (page_size,)).fetchall()
+            while rows:
+                yield [_account(row) for row in rows]
+                if len(rows) < page_size:
+                    return
+                # Continue after the last row seen, which uses the index instead of skipping rows
+                last = rows[-1]
+                rows = conn.execute(f"{_SELECT} WHERE (name, orgno) > (?, ?) ORDER BY name, orgno LIMIT ?",
+                                    (last[0], last[1], page_size)).fetchall()
+        finally:
+            conn.close()
+
+    def save(self, accounts):
+        """
+        Replace the snapshot with AccountRecords
+        """
+        def write(conn):
+            conn.execute("DELETE FROM accounts")
+            conn.executemany(_UPSERT, (_row(account) for account in accounts))
+        self._write(write)
+
+    def apply_diff(self, diff, synced=False):
+        """
+        Update the snapshot with an AccountDiff, only the changed accounts are written
+        :param bool synced: The diff is against all accounts on the server, e.g. from a full refresh, so the snapshot
+            counts as synced. Diffs of single edits don't make the rest of the snapshot any newer
+        """
+        def write(conn):
+            conn.executemany("DELETE FROM accounts WHERE orgno = ?", ((orgno,) for orgno in diff.removed))
+            conn.executemany(_UPSERT, (_row(account) for account in diff.added + diff.changed))
+        self._write(write, synced)
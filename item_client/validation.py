@@ -0,0 +1,138 @@
+import logging
+from operator import itemgetter
+from sys import intern
+
+from item_client.constants import *
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ValidationReport:
+    """
+    Outcome of validating a batch, invalid items are counted per error with the positions of the first few
+    """
+    MAX_EXAMPLES = 5
+
+    def __init__(self, total=0):
+        self.total = total
+        self.invalid = 0
+        self.errors = {}
+
+    def add(self, position, error):
+        self.invalid += 1
+        count, examples = self.errors.get(error, (0, []))
+        if len(examples) < self.MAX_EXAMPLES:
+            examples.append(position)
+        self.errors[error] = (count + 1, examples)
+
+    @property
+    def valid(self):
+        return self.total - self.invalid
+
+    def to_dict(self):
+        return {
+            "total": self.total,
+            "invalid": self.invalid,
+            "errors": {error: {"count": count, "examples": examples} for error, (count, examples) in self.errors.items()},
+        }
+
+    def __str__(self):
+        errors = "; ".join(f"{error} ({count}, e.g. {', '.join(map(str, examples))})"
+                           for error, (count, examples) in self.errors.items())
+        return f"{self.invalid} of {self.total} invalid" + (f": {errors}" if errors else "")
+
+
+class Schema:
+    """
+    Validator compiled once from a mapping of field name to type.
+
+    The checks of every field are generated into a single function, so validating an item costs one call with no loop
+    over the fields. convert returns the item itself if it's valid, or factory called with the field values, and None
+    if it's invalid. Items that already are of the factory type are passed through. Why an item is invalid is only
+    worked out by error, which is slower and meant for the few invalid items.
+    """
+    def __init__(self, field_types, factory=None, intern_fields=()):
+        """
+        :param dict field_types: Field name to the type its value must be an instance of
+        :param factory: Called with the field values in order to convert valid items
+        :param intern_fields: Fields with values shared by many items, only one copy of each value is kept
+        """
+        self.field_types = dict(field_types)
+        self.factory = factory
+        self.convert = self._compile(intern_fields)
+
+    def _compile(self, intern_fields):
+        fields = list(self.field_types)
+        names = [f"v{i}" for i in range(len(fields))]
+        namespace = {"get": itemgetter(*fields), "factory": self.factory, "intern": intern}
+        namespace.update({f"t{i}": field_type for i, field_type in enumerate(self.field_types.values())})
+        checks = " and ".join(f"isinstance({name}, t{i})" for i, name in enumerate(names))
+        values = ", ".join(f"intern({name})" if field in intern_fields else name for field, name in zip(fields, names))
+
+        # Everything the function uses is bound as a default argument, locals are faster to look up than globals
+        lines = [f"def convert(item, {', '.join(f'{name}={name}' for name in namespace)}, isinstance=isinstance):"]
+        if isinstance(self.factory, type):
+            lines += ["    if item.__class__ is factory:", "        return item"]
+        lines += [
+            "    try:",
+            f"        {', '.join(names)}, = get(item)" if len(names) > 1 else "        v0 = get(item)",
+            "    except (KeyError, IndexError, TypeError):",
+            "        return None",
+            f"    if {checks}:",
+            f"        return factory({values})" if self.factory is not None else "        return item",
+            "    return None",
+        ]
+        exec("\n".join(lines), namespace)
+        return namespace["convert"]
+
+    def is_valid(self, item):
+        return self.convert(item) is not None
+
+    def error(self, item):
+        """
+        :return: Why item is invalid or None if it's valid
+        """
+        if not isinstance(item, dict):
+            return "Not an account"
+        for field, field_type in self.field_types.items():
+            if field not in item:
+                return f"Field {field} not in account"
+            if not isinstance(item[field], field_type):
+                return f"Field {field} is not of type {field_type.__name__}"
+        return None
+
+    def validate(self, items):
+        """
+        Validate and convert a batch in one pass
+        :return: tuple of (list of converted valid items, ValidationReport)
+        """
+        items = items if isinstance(items, list) else list(items)
+        converted = list(map(self.convert, items))
+        valid = [item for item in converted if item is not None]
+        report = ValidationReport(len(items))
+        if len(valid) < len(items):
+            for position, item in enumerate(converted):
+                if item is None:
+                    report.add(position, self.error(items[position]))
+        return valid, report
+
+
+ACCOUNT_SCHEMA = Schema(ACCOUNT_FIELD_TYPES)
+
+
+def validate_account(account_data: dict):
+    """
+    Ensures all proper fields exist and they're of the correct type
+    """
+    if ACCOUNT_SCHEMA.convert(account_data) is None:
+        LOGGER.error(ACCOUNT_SCHEMA.error(account_data))
+        return False
+    return True
+
+
+def validate_accounts(accounts):
+    """
+    Validate a batch of account dicts without logging every invalid one
+    :return: tuple of (list of valid accounts, ValidationReport)
+    """
+    return ACCOUNT_SCHEMA.validate(accounts)
@@ -7,6 +7,7 @@ from item_client.client import ItemClient
 
 from item_client.config import setup_logging
 from item_client.constants import *
+from item_client.records import AccountRecord
 
 LOGGER = logging.getLogger(__name__)
 
@@ -45,16 +46,14 @@ class AccountFormView(QDialog):
         if not res:
             return (0, {})
 
-        account = {}
         try:
-            account[FIELD_ORGNO] = int(self.q_orgno.text())
+            orgno = int(self.q_orgno.text())
         except ValueError:
             LOGGER.error(f"Invalid orgno passed: {self.q_orgno.text()}")
             return (0, {"error" : f"Invalid orgno passed: {self.q_orgno.text()}"})
-        account[FIELD_NAME] = self.q_name.text()
-        account[FIELD_LEADER_TITLE] = self.q_leader_title.text()
-        account[FIELD_LEADER_NAME] = self.q_leader_name.text()
-        account[FIELD_TYPE] = self.q_type.text()
+        # Every field is a str except orgno, so the record is valid as built
+        account = AccountRecord(name=self.q_name.text(), orgno=orgno, leader_title=self.q_leader_title.text(),
+                                leader_name=self.q_leader_name.text(), type=self.q_type.text())
         return (res, account)
 
 # For testing purposes
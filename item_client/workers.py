@@ -0,0 +1,184 @@
+import itertools
+import logging
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_THREADS = 4
+
+
+class _WorkerSignals(QObject):
+    # key, generation, item
+    progress = Signal(object, int, object)
+    # key, generation, succeeded, result or exception
+    done = Signal(object, int, bool, object)
+
+
+class _Worker(QRunnable):
+    """
+    Runs a single blocking call on a thread pool thread and reports back through signals
+    """
+    def __init__(self, key, generation, fn, args, iterate=False):
+        super().__init__()
+        self.key = key
+        self.generation = generation
+        self.fn = fn
+        self.args = args
+        self.iterate = iterate
+        self.cancelled = False
+        self.signals = _WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args)
+            if self.iterate:
+                for item in result:
+                    if self.cancelled:
+                        break
+                    self.signals.progress.emit(self.key, self.generation, item)
+                if hasattr(result, "close"):
+                    result.close()
+                result = None
+        except Exception as e:
+            self.signals.done.emit(self.key, self.generation, False, e)
+        else:
+            self.signals.done.emit(self.key, self.generation, True, result)
+
+
+class RequestExecutor(QObject):
+    """
+    Runs blocking calls, e.g. ItemClient requests, off the GUI thread.
+
+    Every call is submitted under a key. Callbacks are always invoked on the GUI thread, and only for the latest call
+    of each key, so a newer call or cancel() makes the results of older calls stale and they are dropped.
+    Calls submitted with coalesce=True while another call with the same key is in flight are merged into a single
+    follow up call that starts once the in flight one is done.
+    If on_progress is given, the call must return an iterable which is consumed in the background, on_progress is
+    called with every item as it arrives and on_result with None once all items are done.
+    """
+    busy_changed = Signal(bool)
+    # key, busy
+    key_busy_changed = Signal(object, bool)
+
+    def __init__(self, parent=None, max_threads=DEFAULT_MAX_THREADS):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._generations = itertools.count(1)
+        self._latest = {}
+        self._callbacks = {}
+        self._in_flight = {}
+        self._pending = {}
+        self._workers = {}
+
+    @property
+    def busy(self):
+        return bool(self._workers)
+
+    def is_busy(self, key):
+        return self._in_flight.get(key, 0) > 0
+
+    def submit(self, key, fn, *args, on_result=None, on_error=None, on_progress=None, coalesce=False):
+        """
+        :return: True if the call was started, False if it was coalesced into a follow up call
+        """
+        if coalesce and self.is_busy(key):
+            LOGGER.debug("Coalescing call %s", key)
+            self._pending[key] = (fn, args, on_result, on_error, on_progress)
+            return False
+        self._start(key, fn, args, on_result, on_error, on_progress)
+        return True
+
+    def cancel(self, key):
+        """
+        Drop the results of all calls with the given key, calls that have not started yet are not run at all
+        """
+        self._latest.pop(key, None)
+        self._pending.pop(key, None)
+        for generation, worker in list(self._workers.items()):
+            if worker.key != key:
+                continue
+            # Running iterations stop at the next item
+            worker.cancelled = True
+            if self._pool.tryTake(worker):
+                self._finish(worker)
+
+    def wait(self, timeout=-1):
+        """
+        Wait for running and queued calls to complete, their callbacks run once control returns to the event loop
+        :param int timeout: Milliseconds to wait at most, -1 to wait until all calls are done
+        :return: False if calls were still running after timeout
+        """
+        return self._pool.waitForDone(timeout)
+
+    def shutdown(self, timeout=-1):
+        """
+        Drop all pending results and wait for running calls to complete
+        :return: False if calls were still running after timeout
+        """
+        for key in list(self._latest):
+            self.cancel(key)
+        return self.wait(timeout)
+
+    def _start(self, key, fn, args, on_result, on_error, on_progress):
+        was_busy = self.busy
+        generation = next(self._generations)
+        self._latest[key] = generation
+        self._callbacks[generation] = (on_result, on_error, on_progress)
+        self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        if self._in_flight[key] == 1:
+            self.key_busy_changed.emit(key, True)
+
+        worker = _Worker(key, generation, fn, args, iterate=on_progress is not None)
+        worker.setAutoDelete(False)
+        worker.signals.progress.connect(self._on_progress)
+        worker.signals.done.connect(self._on_done)
+        # Keep a reference so the worker and its signals outlive the call
+        self._workers[generation] = worker
+        self._pool.start(worker)
+        if not was_busy:
+            self.busy_changed.emit(True)
+
+    def _finish(self, worker):
+        self._workers.pop(worker.generation, None)
+        self._callbacks.pop(worker.generation, None)
+        self._in_flight[worker.key] -= 1
+        if not self._in_flight[worker.key]:
+            del self._in_flight[worker.key]
+            self.key_busy_changed.emit(worker.key, False)
+        if not self.busy:
+            self.busy_changed.emit(False)
+
+    @Slot(object, int, object)
+    def _on_progress(self, key, generation, item):
+        if self._latest.get(key) != generation:
+            return
+        on_progress = self._callbacks[generation][2]
+        on_progress(item)
+
+    @Slot(object, int, bool, object)
+    def _on_done(self, key, generation, succeeded, value):
+        worker = self._workers.get(generation)
+        if worker is None:
+            return
+        on_result, on_error, _ = self._callbacks.get(generation, (None, None, None))
+        stale = self._latest.get(key) != generation
+        if not stale:
+            del self._latest[key]
+
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            # Start the follow up before finishing so the busy state does not flicker
+            self._start(key, *pending)
+        self._finish(worker)
+
+        if stale:
+            LOGGER.debug("Dropping stale result of %s", key)
+        elif succeeded and on_result is not None:
+            on_result(value)
+        elif not succeeded:
+            if on_error is not None:
+                on_error(value)
+            else:
+                LOGGER.error(f"Call {key} failed: {value}")
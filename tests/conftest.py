@@ -0,0 +1,32 @@
+import os
+import time
+
+import pytest
+
+from item_client.fake_server import FakeItemServer, generate_accounts
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture
+def server():
+    with FakeItemServer(generate_accounts(20)) as server:
+        yield server
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    QApplication = pytest.importorskip("PySide6.QtWidgets").QApplication
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def wait(qapp):
+    def wait(done, timeout=5):
+        end = time.monotonic() + timeout
+        while not done():
+            assert time.monotonic() < end, "Timed out"
+            qapp.processEvents()
+            # Spinning processEvents without yielding starves the worker threads
+            time.sleep(0.001)
+    return wait
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from item_client.async_client import AsyncItemClient
+from item_client.exceptions import ServerError
+from item_client.fake_server import FakeItemServer
+
+
+def run(server, call):
+    async def main():
+        async with AsyncItemClient(server.host, server.port) as client:
+            return await call(client)
+    return asyncio.run(main())
+
+
+def test_concurrent_requests(server):
+    responses = run(server, lambda client: asyncio.gather(*(client.get_account(i) for i in range(1, 21))))
+    assert [resp.data["orgno"] for resp in responses] == list(range(1, 21))
+
+
+def test_server_errors_raise():
+    with FakeItemServer(error_rate=1.0) as server:
+        with pytest.raises(ServerError):
+            run(server, lambda client: client.test())
+
+
+def test_several_servers_are_rejected():
+    with pytest.raises(ValueError):
+        AsyncItemClient("127.0.0.1", [8080, 8081])
@@ -0,0 +1,41 @@
+import socket
+import time
+
+from item_client import balancer
+from item_client.client import ItemClient
+from item_client.fake_server import FakeItemServer
+
+
+def test_failover_to_another_replica(server):
+    with FakeItemServer(store=server.store) as down:
+        with ItemClient(server.host, [server.port, down.port], health_check_interval=None) as client:
+            down.stop()
+            for _ in range(6):
+                assert client.get_account(3).result
+            assert client.failovers > 0
+
+
+def test_close_is_not_undone_by_a_running_health_check(server, monkeypatch):
+    # Close gives up waiting for the health checks long before checks of replicas that never answer time out
+    monkeypatch.setattr(balancer, "DEFAULT_HEALTH_CHECK_TIMEOUT", 0.2)
+    hanging = [socket.socket(), socket.socket()]
+    for sock in hanging:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+    ports = [server.port] + [sock.getsockname()[1] for sock in hanging]
+    client = ItemClient(server.host, ports, health_check_interval=0.1)
+    try:
+        for replica in client.balancer.replicas[1:]:
+            replica.breaker = None
+        assert client.get_account(3).result
+        time.sleep(0.3)
+        checks = client.balancer._thread
+        client.close()
+        checks.join(5)
+        assert not checks.is_alive()
+        assert client._session is None
+        assert client.balancer._thread is None
+    finally:
+        client.close()
+        for sock in hanging:
+            sock.close()
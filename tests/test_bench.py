@@ -0,0 +1,24 @@
+from item_client.bench import Benchmark
+from item_client.client import ItemClient
+from item_client.fake_server import FakeItemServer
+from item_client.resilience import CircuitBreaker
+
+
+def test_errors_are_counted():
+    with FakeItemServer(error_rate=0.5, seed=1) as server:
+        with ItemClient(server.host, server.port, retry=None, breaker=False) as client:
+            report = Benchmark(client, mix="test=1", concurrency=2, duration=0.3).run()
+    total = report["total"]
+    assert total["requests"] > 0
+    assert 0 < total["errors"] < total["requests"]
+    assert total["rejected"] == 0
+
+
+def test_breaker_rejections_are_not_timed(server):
+    with ItemClient(server.host, server.port, retry=None) as client:
+        replica = client.balancer.replicas[0]
+        replica.breaker = CircuitBreaker(replica.url_prefix, failure_threshold=1, reset_timeout=10)
+        replica.breaker.record_failure()
+        report = Benchmark(client, mix="test=1", concurrency=2, duration=0.1).run()
+    assert report["total"]["requests"] == 0
+    assert report["total"]["rejected"] > 0
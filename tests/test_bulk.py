@@ -0,0 +1,47 @@
+import io
+import json
+
+from item_client.bulk import BULK_ADD, BULK_DELETE, run_bulk
+from item_client.client import ItemClient
+from item_client.fake_server import generate_accounts
+
+
+def run(server, command, lines):
+    output = io.StringIO()
+    with ItemClient(server.host, server.port) as client:
+        counts = run_bulk(client, command, io.StringIO("\n".join(lines)), output, concurrency=4)
+    return counts, [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_results_are_in_input_order(server):
+    accounts = generate_accounts(30, start=101)
+    (succeeded, failed), results = run(server, BULK_ADD, [json.dumps(account) for account in accounts])
+    assert (succeeded, failed) == (30, 0)
+    assert [result["orgno"] for result in results] == [account["orgno"] for account in accounts]
+    assert [result["line"] for result in results] == list(range(1, 31))
+    assert len(server.store) == 50
+
+
+def test_invalid_lines_fail_without_being_sent(server):
+    lines = [
+        json.dumps(generate_accounts(1, start=101)[0]),
+        "{not json",
+        json.dumps({"orgno": 102, "name": "missing fields"}),
+        "",
+        json.dumps(generate_accounts(1, start=3)[0]),
+    ]
+    (succeeded, failed), results = run(server, BULK_ADD, lines)
+    assert (succeeded, failed) == (1, 3)
+    assert [result["line"] for result in results] == [1, 2, 3, 5]
+    assert [result["result"] for result in results] == [True, False, False, False]
+    assert results[1]["message"].startswith("Invalid json")
+    assert results[2]["message"] == "Field leader_title not in account"
+    assert "already exists" in results[3]["message"]
+    assert len(server.store) == 21
+
+
+def test_delete_takes_orgnos_or_accounts(server):
+    lines = ["1", json.dumps({"orgno": 2}), '"three"']
+    (succeeded, failed), results = run(server, BULK_DELETE, lines)
+    assert (succeeded, failed) == (2, 1)
+    assert results[2]["message"] == "Field orgno is not an int"
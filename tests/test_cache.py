@@ -0,0 +1,22 @@
+from item_client.cache import ResponseCache
+from item_client.client import ItemClient
+
+
+def test_cache_revalidates_expired_responses(server):
+    cache = ResponseCache(ttl=0)
+    with ItemClient(server.host, server.port, cache=cache) as client:
+        first = client.get_accounts()
+        assert client.get_accounts() is first
+        assert cache.revalidations == 1
+
+        server.store.edit_account(3, {"leader_name": "changed"})
+        changed = client.get_accounts()
+        assert changed is not first
+        assert changed.data[2]["leader_name"] == "changed"
+
+
+def test_edits_invalidate_cached_responses(server):
+    with ItemClient(server.host, server.port, cache=ResponseCache()) as client:
+        assert client.get_account(3).data["leader_name"] == "leader3"
+        client.edit_account({"orgno": 3, "leader_name": "changed"})
+        assert client.get_account(3).data["leader_name"] == "changed"
@@ -0,0 +1,47 @@
+import socket
+import subprocess
+import sys
+
+import pytest
+
+from item_client.client import ItemClient, quick_test
+from item_client.fake_server import FakeItemServer
+
+
+def test_account_pages(server):
+    with ItemClient(server.host, server.port) as client:
+        pages = list(client.iter_account_pages(page_size=6))
+        assert [len(page) for page in pages] == [6, 6, 6, 2]
+        assert list(client.iter_accounts(page_size=6, prefetch=False)) == client.get_accounts().data
+
+
+def test_edit_conflict(server):
+    with ItemClient(server.host, server.port) as client:
+        base = client.get_account(3).data
+        server.store.edit_account(3, {"type": "other"})
+        resp = client.edit_account({"orgno": 3, "leader_name": "mine"}, base=base)
+        assert resp.conflict and not resp.result
+        assert resp.data["type"] == "other"
+        resp = client.edit_account({"orgno": 3, "leader_name": "mine"}, base=resp.data)
+        assert resp.result and resp.data["leader_name"] == "mine"
+
+
+def test_quick_test(server):
+    assert quick_test(server.host, server.port).result
+    with FakeItemServer(error_rate=1.0) as failing:
+        with pytest.raises(ValueError):
+            quick_test(failing.host, failing.port)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    with pytest.raises(OSError):
+        quick_test("127.0.0.1", port, connect_timeout=1)
+
+
+def test_test_command_starts_without_requests(server):
+    code = ("import runpy, sys; sys.argv = ['client', '--port', sys.argv[1], 'test']\n"
+            "try:\n    runpy.run_module('item_client.client', run_name='__main__')\n"
+            "finally:\n    assert 'requests' not in sys.modules")
+    proc = subprocess.run([sys.executable, "-c", code, str(server.port)], capture_output=True, text=True, timeout=30)
+    assert proc.returncode == 0, proc.stderr
+    assert "Test successful" in proc.stderr
@@ -0,0 +1,26 @@
+import requests
+
+from item_client.fake_server import FakeItemServer
+
+
+def test_routes(server):
+    url = f"http://{server.host}:{server.port}/api/v1"
+    assert requests.get(f"{url}/test").json()["result"]
+    assert requests.get(f"{url}/account/3").json()["data"]["orgno"] == 3
+    assert len(requests.get(f"{url}/accounts/5", params={"offset": 18}).json()["data"]) == 2
+    assert requests.get(f"{url}/nothing").status_code == 404
+
+
+def test_injected_errors():
+    with FakeItemServer(error_rate=1.0) as server:
+        resp = requests.get(f"http://{server.host}:{server.port}/api/v1/test")
+        assert resp.status_code == 500
+
+
+def test_dropped_connections_are_not_reported(server, capsys):
+    for error in (ConnectionResetError, BrokenPipeError):
+        try:
+            raise error()
+        except OSError:
+            server._httpd.handle_error(None, ("127.0.0.1", 12345))
+    assert capsys.readouterr().err == ""
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from item_client import main
+from item_client.fake_server import FakeItemServer, generate_accounts
+
+
+@pytest.fixture
+def view_of(qapp, wait, monkeypatch):
+    monkeypatch.setattr(main.MainView, "POLL_MIN_INTERVAL", 50)
+    views = []
+
+    def view_of(server, **kwargs):
+        view = main.MainView(server.host, server.port, snapshot_path="", **kwargs)
+        views.append(view)
+        wait(lambda: not view.executor.busy)
+        return view
+
+    yield view_of
+    for view in views:
+        view.shutdown()
+
+
+def test_polling_uses_etags(view_of, wait, server):
+    view = view_of(server)
+    wait(lambda: view.client.etags_supported is not None and not view.executor.busy)
+    assert view.client.etags_supported
+    assert view.poll_timer.isActive()
+
+
+def test_polling_is_off_without_etags(view_of, wait):
+    with FakeItemServer(generate_accounts(20), etags=False) as server:
+        view = view_of(server)
+        wait(lambda: view.client.etags_supported is not None and not view.executor.busy)
+        assert not view._poll
+        assert not view.poll_timer.isActive()
+        assert len(view.model) == 20
+
+
+def test_shutdown_aborts_requests_in_flight(wait):
+    with FakeItemServer(generate_accounts(20), latency=10) as server:
+        view = main.MainView(server.host, server.port, snapshot_path="", poll=False)
+        wait(lambda: view.executor.is_busy(view.REQUEST_POPULATE))
+        time.sleep(0.2)
+        start = time.monotonic()
+        view.shutdown()
+        assert time.monotonic() - start < 2
+        assert view.executor.wait(0)
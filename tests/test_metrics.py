@@ -0,0 +1,49 @@
+import json
+
+from item_client.client import ItemClient
+from item_client.metrics import MetricsHook, MetricsRegistry
+
+
+def test_requests_are_recorded(server):
+    hook = MetricsHook()
+    infos = []
+    with ItemClient(server.host, server.port, hooks=[hook, infos.append]) as client:
+        client.get_account(3)
+        client.get_accounts()
+    assert [(info.method, info.endpoint, info.status) for info in infos] == [("GET", "account", 200),
+                                                                             ("GET", "accounts", 200)]
+    assert infos[1].bytes_received > infos[0].bytes_received > 0
+    assert all(info.total >= info.decode >= 0 for info in infos)
+
+    metrics = json.loads(hook.registry.to_json())
+    requests = {entry["labels"]["endpoint"]: entry["value"] for entry in metrics["item_client_requests_total"]}
+    assert requests == {"account": 1, "accounts": 1}
+    seconds = metrics["item_client_request_seconds"][0]["value"]
+    assert seconds["count"] == 1 and seconds["buckets"]["+Inf"] == 1
+
+
+def test_failing_hooks_do_not_fail_requests(server):
+    def hook(info):
+        raise RuntimeError("broken hook")
+
+    with ItemClient(server.host, server.port, hooks=[hook]) as client:
+        assert client.test().result
+
+
+def test_prometheus_output():
+    registry = MetricsRegistry()
+    registry.counter("requests_total", endpoint="test").inc(2)
+    histogram = registry.histogram("request_seconds", buckets=[0.1, 1], endpoint="test")
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+    assert registry.to_prometheus().splitlines() == [
+        "# TYPE request_seconds histogram",
+        'request_seconds_bucket{endpoint="test",le="0.1"} 1',
+        'request_seconds_bucket{endpoint="test",le="1"} 2',
+        'request_seconds_bucket{endpoint="test",le="+Inf"} 3',
+        'request_seconds_sum{endpoint="test"} 5.55',
+        'request_seconds_count{endpoint="test"} 3',
+        "# TYPE requests_total counter",
+        'requests_total{endpoint="test"} 2',
+    ]
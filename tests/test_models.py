@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("PySide6")
+
+from item_client.diff import AccountDiff, diff_accounts
+from item_client.fake_server import generate_accounts
+from item_client.models import AccountFilterModel, AccountTableModel
+from item_client.records import to_records
+
+
+@pytest.fixture
+def accounts():
+    return to_records(generate_accounts(10))
+
+
+def test_model_applies_diffs(qapp, accounts):
+    model = AccountTableModel()
+    model.add_accounts(accounts)
+    fetched = [account.replace(name="aaa") if account.orgno == 5 else account for account in accounts[1:]]
+    model.apply_diff(diff_accounts(model.accounts_by_orgno, fetched))
+    assert model.rowCount() == len(fetched)
+    assert model.account(0).orgno == 5
+    assert sorted(model.orgnos()) == sorted(account.orgno for account in fetched)
+
+
+def test_model_skips_accounts_of_overlapping_pages(qapp, accounts):
+    model = AccountTableModel()
+    model.add_accounts(accounts[:5])
+    model.add_accounts(accounts[4:])
+    assert model.rowCount() == len(accounts)
+
+
+def test_filter_drops_removed_accounts(qapp, accounts):
+    model = AccountTableModel()
+    model.add_accounts(accounts)
+    search = AccountFilterModel(model)
+    search.set_query("company")
+    model.apply_diff(AccountDiff(removed=[1, 2, 5]))
+    assert search.rowCount() == len(accounts) - 3
+    assert all(search.account(row) is not None for row in range(search.rowCount()))
+
+
+def test_updating_a_removed_account_adds_it(qapp, accounts):
+    model = AccountTableModel()
+    model.add_accounts(accounts)
+    model.remove_accounts([3])
+    model.update_account(accounts[2].replace(leader_name="edited"))
+    assert model.rowCount() == len(accounts)
+    assert model.accounts_by_orgno[3].leader_name == "edited"
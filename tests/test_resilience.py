@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from item_client.client import ItemClient
+from item_client.exceptions import CircuitOpenError, DeadlineExceeded, ServerError
+from item_client.fake_server import FakeItemServer
+from item_client.resilience import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker, RetryPolicy
+
+
+def test_server_errors_are_retried():
+    with FakeItemServer(error_rate=1.0) as server:
+        with ItemClient(server.host, server.port, retry=RetryPolicy(max_retries=2, backoff=0), breaker=False) as client:
+            with pytest.raises(ServerError):
+                client.test()
+            assert client.retries == 2
+
+
+def test_breaker_opens_and_closes():
+    breaker = CircuitBreaker("server", failure_threshold=2, reset_timeout=0.1)
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    time.sleep(0.1)
+    breaker.allow()
+    assert breaker.state == STATE_HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+
+
+def open_breaker(client, reset_timeout):
+    replica = client.balancer.replicas[0]
+    replica.breaker = CircuitBreaker(replica.url_prefix, failure_threshold=1, reset_timeout=reset_timeout)
+    replica.breaker.record_failure()
+
+
+def test_requests_wait_for_an_open_breaker(server):
+    with ItemClient(server.host, server.port, retry=RetryPolicy(backoff=0)) as client:
+        open_breaker(client, 0.2)
+        start = time.monotonic()
+        assert client.get_account(3).result
+        assert time.monotonic() - start >= 0.2
+        assert client.retries == 1
+
+
+def test_requests_without_retries_fail_fast_on_an_open_breaker(server):
+    with ItemClient(server.host, server.port, retry=None) as client:
+        open_breaker(client, 10)
+        with pytest.raises(CircuitOpenError):
+            client.get_account(3)
+
+
+def test_deadline_includes_waiting_for_an_open_breaker(server):
+    with ItemClient(server.host, server.port, deadline=0.2) as client:
+        open_breaker(client, 10)
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            client.get_account(3)
+        assert time.monotonic() - start < 1
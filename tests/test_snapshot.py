@@ -0,0 +1,35 @@
+from item_client.diff import AccountDiff
+from item_client.fake_server import generate_accounts
+from item_client.records import to_records
+from item_client.snapshot import SnapshotStore
+
+
+def test_snapshot_pages(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshot.sqlite3"))
+    assert store.synced_at is None
+    accounts = to_records(generate_accounts(25))
+    store.save(accounts)
+    assert store.synced_at is not None
+    pages = list(store.iter_account_pages(page_size=10))
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert [account for page in pages for account in page] == store.get_accounts() == accounts
+    assert store.get_accounts(3) == accounts[:3]
+
+
+def test_snapshot_applies_diffs(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshot.sqlite3"))
+    accounts = to_records(generate_accounts(5))
+    store.save(accounts)
+    synced_at = store.synced_at
+
+    added = to_records(generate_accounts(1, start=6))
+    changed = [accounts[2].replace(leader_name="changed")]
+    store.apply_diff(AccountDiff(added=added, changed=changed, removed=[1]))
+    assert len(store) == 5
+    assert store.get_account(1) is None
+    assert store.get_account(3).leader_name == "changed"
+    assert store.get_account(6) == added[0]
+    assert store.synced_at == synced_at
+
+    store.apply_diff(AccountDiff(), synced=True)
+    assert store.synced_at > synced_at
@@ -0,0 +1,51 @@
+from item_client.fake_server import generate_accounts
+from item_client.records import RECORD_SCHEMA, AccountRecord
+from item_client.validation import ACCOUNT_SCHEMA, Schema
+
+
+def account(**fields):
+    account = generate_accounts(1, start=7)[0]
+    account.update(fields)
+    return account
+
+
+def test_valid_accounts_are_converted():
+    record = RECORD_SCHEMA.convert(account(extra="ignored"))
+    assert isinstance(record, AccountRecord)
+    assert record.orgno == 7
+    assert RECORD_SCHEMA.convert(record) is record
+    assert ACCOUNT_SCHEMA.convert(account()) == account()
+    assert RECORD_SCHEMA.error(account()) is None
+
+
+def test_invalid_accounts():
+    missing = account()
+    del missing["leader_name"]
+    cases = [
+        (missing, "Field leader_name not in account"),
+        (account(orgno="7"), "Field orgno is not of type int"),
+        (account(name=None), "Field name is not of type str"),
+        ([1, 2, 3, 4, 5], "Not an account"),
+        ("account", "Not an account"),
+        (None, "Not an account"),
+    ]
+    for item, error in cases:
+        assert RECORD_SCHEMA.convert(item) is None
+        assert RECORD_SCHEMA.error(item) == error
+
+
+def test_single_field_schema():
+    schema = Schema({"orgno": int})
+    assert schema.convert({"orgno": 1}) == {"orgno": 1}
+    assert schema.convert({"orgno": "1"}) is None
+
+
+def test_batch_report():
+    items = [account(), account(orgno="x"), "account", account(), account(orgno=None)]
+    valid, report = RECORD_SCHEMA.validate(items)
+    assert len(valid) == 2
+    assert (report.total, report.invalid, report.valid) == (5, 3, 2)
+    assert report.to_dict()["errors"] == {
+        "Field orgno is not of type int": {"count": 2, "examples": [1, 4]},
+        "Not an account": {"count": 1, "examples": [2]},
+    }
@@ -0,0 +1,38 @@
+import threading
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from item_client.workers import RequestExecutor
+
+
+def test_executor_coalesces_calls(qapp, wait):
+    executor = RequestExecutor()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def call():
+        calls.append(1)
+        release.wait(5)
+        return len(calls)
+
+    for _ in range(3):
+        executor.submit("key", call, on_result=results.append, coalesce=True)
+    release.set()
+    wait(lambda: not executor.busy)
+    # The in flight call completes, the other two are merged into one follow up
+    assert len(calls) == 2
+    assert results == [1, 2]
+
+
+def test_executor_cancel_drops_results(qapp, wait):
+    executor = RequestExecutor()
+    release = threading.Event()
+    results = []
+    executor.submit("key", release.wait, 5, on_result=results.append)
+    executor.cancel("key")
+    release.set()
+    wait(lambda: not executor.busy)
+    assert results == []